@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+"""
+Decode throughput of HammingCode with diagnostics disabled and enabled.
+
+Usage: python3 benchmarks/bench_hamming_code.py [iterations]
+"""
+
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hamming_code import HammingCode, logger  # noqa: E402
+
+
+def bench(label: str, statement, iterations: int) -> None:
+    """
+    Runs the statement and prints the number of decoded words per second.
+
+    Args:
+        label (str): Name printed in front of the result
+        statement (callable): Decodes all 2048 received words once
+        iterations (int): Number of repetitions
+    """
+    seconds = min(timeit.repeat(statement, number=iterations, repeat=3))
+    print("%-32s %12.0f words/s" % (label, 2048 * iterations / seconds))
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    h = HammingCode()
+    words = [tuple((i >> (10 - j)) & 1 for j in range(11)) for i in range(2048)]
+    packed = list(range(2048))
+
+    def decode_all():
+        for word in words:
+            h.decode(word)
+
+    def decode_int_all():
+        for word in packed:
+            h.decode_int(word)
+
+    logger.setLevel(logging.WARNING)
+    bench("decode(), diagnostics off", decode_all, iterations)
+    bench("decode_int(), diagnostics off", decode_int_all, iterations)
+
+    handler = logging.FileHandler(os.devnull)
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    bench("decode(), diagnostics on", decode_all, iterations)
+    bench("decode_int(), diagnostics on", decode_int_all, iterations)
+    logger.removeHandler(handler)
+    handler.close()
+
+
+if __name__ == '__main__':
+    main()
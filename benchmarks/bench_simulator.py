@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+"""
+Projected cards per hour of the scanning configurations in main, run on simulated devices in virtual time.
+
+Usage: python3 benchmarks/bench_simulator.py [cards]
+"""
+
+import contextlib
+import os
+import sys
+import time
+import unittest.mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import main  # noqa: E402
+from hamming_code import HammingCode  # noqa: E402
+from simulator import SimulatedDevices  # noqa: E402
+
+CONFIGURATIONS = (
+    ("step, 1 sample", dict(SWEEP_SCANNING=False, BIDIRECTIONAL_SCANNING=False, BURST_SAMPLES=1)),
+    ("step, 5 samples", dict(SWEEP_SCANNING=False, BIDIRECTIONAL_SCANNING=False, BURST_SAMPLES=5)),
+    ("step, bidirectional", dict(SWEEP_SCANNING=False, BIDIRECTIONAL_SCANNING=True, BURST_SAMPLES=5)),
+    ("sweep", dict(SWEEP_SCANNING=True, BIDIRECTIONAL_SCANNING=False, BURST_SAMPLES=1)),
+    ("sweep, bidirectional", dict(SWEEP_SCANNING=True, BIDIRECTIONAL_SCANNING=True, BURST_SAMPLES=1)),
+)
+
+
+def bench(label: str, configuration: dict, deck: list) -> None:
+    """
+    Runs main.run() over the deck and prints the projected and the simulated throughput.
+
+    Args:
+        label (str): Name printed in front of the result
+        configuration (dict): Values of the module constants of main
+        deck (list): Cards to scan
+    """
+    devices = SimulatedDevices(deck, seed=1)
+    start = time.monotonic()
+    with unittest.mock.patch.multiple(main, CALIBRATE=False, CHECKPOINTING=False, **configuration), \
+            open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        main.run(devices, cards=len(deck))
+    seconds = time.monotonic() - start
+    print("%-24s %10.1f cards/h %12.0f simulated cards/min" % (
+        label, 3600 * len(deck) / devices.clock.monotonic(), 60 * len(deck) / seconds))
+
+
+def main_() -> None:
+    cards = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    h = HammingCode()
+    card = [h.encode(word) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1), (0, 1, 0, 1, 0, 0),
+                                        (0, 0, 0, 0, 1, 1), (0, 1, 0, 1, 1, 0), (0, 1, 0, 0, 0, 0))]
+    for label, configuration in CONFIGURATIONS:
+        bench(label, configuration, [card] * cards)
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+Per-handler micro-benchmark of the table-driven NOT, HEX, FAC, XOR and top() against the loops they replaced.
+
+Usage: python3 benchmarks/bench_stack_machine.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from stack_machine import BIT_TUPLES, COMPLEMENTS, FACTORIALS, HEX_DIGITS, StackMachine  # noqa: E402
+
+
+def not_loop(x):
+    b = []
+    n = x
+    while n > 0:
+        b.append(n % 2)
+        n = n // 2
+    while len(b) < 4:
+        b.append(0)
+    b.reverse()
+    st2 = "0b0000"
+    for i in range(4):
+        st2 += str(b[i] ^ 1)
+    return int(st2, 2)
+
+
+def hex_ladder(x, y):
+    tot = 0
+    for value, weight in ((x, 16), (y, 1)):
+        try:
+            int(value)
+            tot = tot + weight * value
+        except ValueError:
+            tot = tot + weight * " ABCDEF".index(value) + weight * 9
+    return tot
+
+
+def fac_loop(x):
+    z = 1
+    for j in range(1, x + 1):
+        z = z * j
+    return z & 0xFF
+
+
+def xor_bin(x, y):
+    return int(bin(x), 2) ^ int(bin(y), 2)
+
+
+def top_loop(top):
+    i = 1
+    b = []
+    n = top
+    while n > 0:
+        b.append(n % 2)
+        n = n // 2
+        i += 1
+    while i != 9:
+        b.append(0)
+        i += 1
+    b.reverse()
+    return tuple(b)
+
+
+class Silent:
+    """
+    Speaker that drops every announcement
+    """
+
+    def say(self, text, droppable=True):
+        pass
+
+    def flush(self, timeout=None):
+        return True
+
+
+def bench(label: str, statement, iterations: int) -> None:
+    """
+    Runs the statement and prints the time per call.
+
+    Args:
+        label (str): Name printed in front of the result
+        statement (callable): Calls the handler once
+        iterations (int): Number of repetitions
+    """
+    seconds = min(timeit.repeat(statement, number=iterations, repeat=3))
+    print("%-28s %10.3f us" % (label, seconds / iterations * 1e6))
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bench("NOT loop", lambda: not_loop(10), iterations)
+    bench("NOT table", lambda: COMPLEMENTS[10], iterations)
+    bench("HEX ladder", lambda: hex_ladder("F", 7), iterations)
+    bench("HEX map", lambda: HEX_DIGITS["F"] << 4 | HEX_DIGITS[7], iterations)
+    bench("FAC loop", lambda: fac_loop(12), iterations)
+    bench("FAC table", lambda: FACTORIALS[12], iterations)
+    bench("XOR bin()", lambda: xor_bin(10, 7), iterations)
+    bench("XOR", lambda: 10 ^ 7, iterations)
+    bench("top() loop", lambda: top_loop(170), iterations)
+    bench("top() table", lambda: BIT_TUPLES[170], iterations)
+
+    # Whole code words through execute(), including the push of the operands
+    sm = StackMachine(Silent())
+    for label, opcodes in (("execute 10 NOT", (10, 0b011110)), ("execute F 7 HEX", (7, 0b101001, 0b011100)),
+                           ("execute 5 FAC", (5, 0b011101)), ("execute 10 7 XOR", (10, 7, 0b011111))):
+        def run(opcodes=opcodes):
+            for opcode in opcodes:
+                sm.execute(opcode)
+            sm.stack.clear()
+        bench(label, run, iterations // 10)
+    sm.execute(170 >> 4)
+    bench("execute top()", sm.top, iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+import logging
+import os
+import struct
+from typing import Tuple
+
+from stack_machine import StackMachine
+
+logger = logging.getLogger(__name__)
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Journal record: sequence number, card, line on the card, executed 6-bit code word or END_OF_CARD
+JOURNAL_RECORD = struct.Struct("=IHHB")
+END_OF_CARD = 0xFF
+
+# Snapshot header: magic, sequence number of the last journaled record, card and line to continue from, overflow
+# flag; followed by OperandStack.snapshot()
+SNAPSHOT_MAGIC = b"SMS1"
+SNAPSHOT_HEADER = struct.Struct("=4sIHHB")
+
+
+class _Muted:
+    """
+    Speaker that drops the announcements of replayed code words
+    """
+
+    def say(self, text, droppable: bool = True) -> None:
+        pass
+
+    def flush(self, timeout: float = None) -> bool:
+        return True
+
+
+class Checkpoint:
+    """
+    Persists the state of a StackMachine as an append-only journal of executed code words plus periodic snapshots
+    of the stack, so that a deck can be resumed after a power loss or a restart
+    """
+
+    def __init__(self, directory: str, machine: StackMachine, batch: int = 8, snapshot_every: int = 64) -> None:
+        """
+        Initializes the class Checkpoint with all values necessary. Call restore() before recording.
+
+        Args:
+            directory (str): Directory of the journal and the snapshot, created if missing
+            machine (StackMachine): Machine whose state is persisted
+            batch (int): Number of journal records written before they are synced to the storage
+            snapshot_every (int): Number of journal records after which the stack is snapshotted and the journal
+                started anew
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, "journal.bin")
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+        self.machine = machine
+        self.batch = batch
+        self.snapshot_every = snapshot_every
+        self.sequence = 0  # Sequence number of the last record
+        self.snapshot_sequence = 0  # Sequence number covered by the snapshot
+        self.card = 0
+        self.line = 0  # Next line on the card
+        self.pending = 0  # Records not yet synced
+        self.journal = None
+
+    def restore(self) -> Tuple[int, int]:
+        """
+        Rebuilds the machine from the latest snapshot and the journal records after it, without announcements.
+
+        Returns:
+            tuple: (card, line) to continue from, (0, 0) if there is nothing to resume
+        """
+        stack = self.machine.stack
+        stack.clear()
+        self.machine.overflow = False
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+            magic, sequence, card, line, overflow = SNAPSHOT_HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("Unknown snapshot format")
+            stack.restore(data[SNAPSHOT_HEADER.size:])
+            self.sequence = self.snapshot_sequence = sequence
+            self.card, self.line = card, line
+            self.machine.overflow = bool(overflow)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, struct.error) as error:
+            logger.warning("Ignoring snapshot: %s", error)
+
+        replayed = 0
+        valid = 0  # Length of the intact part of the journal
+        data = b""
+        speaker = self.machine.speaker
+        self.machine.speaker = _Muted()
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+            # A record cut off or garbled by a power loss ends the journal
+            for offset in range(0, len(data) - JOURNAL_RECORD.size + 1, JOURNAL_RECORD.size):
+                sequence, card, line, opcode = JOURNAL_RECORD.unpack_from(data, offset)
+                if opcode != END_OF_CARD and opcode > 0b111111:
+                    logger.warning("Ignoring the journal from offset %d: invalid code word %d", offset, opcode)
+                    break
+                valid = offset + JOURNAL_RECORD.size
+                if sequence <= self.sequence:
+                    continue  # Already in the snapshot
+                if opcode == END_OF_CARD:
+                    self.card, self.line = card + 1, 0
+                else:
+                    self.machine.execute(opcode)
+                    self.card, self.line = card, line + 1
+                self.sequence = sequence
+                replayed += 1
+        except FileNotFoundError:
+            pass
+        finally:
+            self.machine.speaker = speaker
+        if self.sequence:
+            logger.info("Resumed at card %d line %d, %d code words replayed", self.card, self.line, replayed)
+        if valid < len(data):
+            # New records must start at a record boundary
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid)
+                os.fsync(f.fileno())
+        self.journal = open(self.journal_path, "ab")
+        return self.card, self.line
+
+    def record(self, line: int, code_word: Tuple[int, ...]) -> None:
+        """
+        Journals a code word after it has been executed.
+
+        Args:
+            line (int): Line of the current card the code word was read from
+            code_word (tuple): Executed code word, most significant bit first
+        """
+        opcode = 0
+        for bit in code_word:
+            opcode = (opcode << 1) | bit
+        self.line = line + 1
+        self.__append(line, opcode)
+        if self.sequence - self.snapshot_sequence >= self.snapshot_every:
+            self.snapshot()
+
+    def end_card(self) -> None:
+        """
+        Journals that the current card has been processed completely, the next one starts at its first line.
+        Nothing is journaled before the first code word of a deck, there is no state to resume then.
+        """
+        if not self.sequence:
+            return
+        self.__append(self.line, END_OF_CARD)
+        self.card += 1
+        self.line = 0
+        self.sync()
+
+    def snapshot(self) -> None:
+        """
+        Writes the stack to the snapshot file and starts a new journal.
+        """
+        self.sync()
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.sequence, self.card, self.line, self.machine.overflow))
+            f.write(self.machine.stack.snapshot())
+            f.flush()
+            os.fsync(f.fileno())
+        # Replace atomically; the old journal records are skipped by their sequence number if truncating fails
+        os.replace(temporary, self.snapshot_path)
+        self.snapshot_sequence = self.sequence
+        self.journal.close()
+        self.journal = open(self.journal_path, "wb")
+
+    def finish(self) -> None:
+        """
+        Discards the checkpoint once the program has stopped, the next deck starts from an empty stack.
+        """
+        self.close()
+        for path in (self.journal_path, self.snapshot_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.sequence = self.snapshot_sequence = 0
+        self.card = self.line = 0
+        self.journal = open(self.journal_path, "ab")
+
+    def sync(self) -> None:
+        """
+        Writes the pending journal records through to the storage.
+        """
+        if self.pending:
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.pending = 0
+
+    def close(self) -> None:
+        """
+        Syncs and closes the journal.
+        """
+        if self.journal is not None:
+            self.sync()
+            self.journal.close()
+            self.journal = None
+
+    def __append(self, line: int, opcode: int) -> None:
+        """
+        Appends a record to the journal and syncs every batch records.
+        """
+        self.sequence += 1
+        self.journal.write(JOURNAL_RECORD.pack(self.sequence, self.card, line, opcode))
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.sync()
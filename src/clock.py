@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+class Clock:
+    """
+    Wall clock, every wait of the robot and the pipeline goes through a clock so that simulations can skip it
+    """
+
+    def monotonic(self) -> float:
+        """
+        Returns:
+            float: Seconds since an arbitrary point in time
+        """
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Waits for a number of seconds.
+
+        Args:
+            seconds (float): Seconds to wait, nothing happens if not positive
+        """
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Clock whose time only advances when it is slept on, sleeping returns immediately
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        """
+        Initializes the class VirtualClock with all values necessary.
+
+        Args:
+            start (float): Initial time
+        """
+        self.now = start
+        self.slept = 0.0  # Seconds skipped by sleep()
+        self.lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            with self.lock:
+                self.now += seconds
+                self.slept += seconds
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from typing import Callable, Dict, List, Tuple, Union
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Values returned for the colors of the bar code, as returned by Robot.read_value()
+WHITE = 0
+BLACK = 1
+RED = 5
+
+# Raw RGB values are quantized to this many bits per channel for the lookup tables
+QUANT_BITS = 5
+QUANT_SHIFT = 10 - QUANT_BITS  # Raw values of the color sensor use 10 bits
+
+# Samples farther than this from every centroid (relative to the white-black distance) are unknown
+MAX_DISTANCE = 0.75
+
+# Marks an unknown color in the class table
+UNKNOWN = 255
+
+
+class ColorClassifier:
+    """
+    Nearest-centroid classifier for raw RGB samples, compiled into quantized lookup tables
+    """
+
+    def __init__(self, centroids: Dict[int, Tuple[float, float, float]], tables: bytes = None) -> None:
+        """
+        Initializes the class ColorClassifier and compiles the lookup tables unless they are given.
+
+        Args:
+            centroids (dict): Mean raw (red, green, blue) sample of WHITE, BLACK and RED
+            tables (bytes): Previously compiled class, confidence and black probability tables, concatenated
+        """
+        size = 1 << (3 * QUANT_BITS)
+        self.centroids = {value: tuple(float(c) for c in centroid) for value, centroid in centroids.items()}
+        if tables is not None and len(tables) == 3 * size:
+            self.classes = bytearray(tables[:size])
+            self.confidences = bytearray(tables[size:2 * size])
+            self.black_probabilities = bytearray(tables[2 * size:])
+        else:
+            self.classes = bytearray(size)
+            self.confidences = bytearray(size)
+            self.black_probabilities = bytearray(size)
+            self.__compile()
+
+    @classmethod
+    def fit(cls, samples: Dict[int, List[Tuple[int, int, int]]]) -> 'ColorClassifier':
+        """
+        Fits the centroids to calibration samples of known patches.
+
+        Args:
+            samples (dict): Raw samples taken over WHITE, BLACK and RED patches
+        Returns:
+            ColorClassifier: Classifier with the mean of each class as centroid
+        """
+        centroids = {}
+        for value, readings in samples.items():
+            if not readings:
+                raise ValueError("No calibration samples for color %d" % value)
+            centroids[value] = tuple(sum(reading[c] for reading in readings) / len(readings) for c in range(3))
+        return cls(centroids)
+
+    @classmethod
+    def load(cls, path: str) -> 'ColorClassifier':
+        """
+        Loads the centroids and the compiled lookup tables written by save().
+
+        Args:
+            path (str): Path of the calibration file
+        Returns:
+            ColorClassifier: Calibrated classifier, the tables are recompiled if they are missing or truncated
+        """
+        with open(path, "rb") as f:
+            centroids = json.loads(f.readline().decode())
+            tables = f.read()
+        return cls({int(value): tuple(centroid) for value, centroid in centroids.items()}, tables)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the centroids as a line of JSON followed by the compiled lookup tables to a calibration file.
+
+        Args:
+            path (str): Path of the calibration file
+        """
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(json.dumps({str(value): centroid for value, centroid in self.centroids.items()}).encode())
+            f.write(b"\n")
+            f.write(self.classes)
+            f.write(self.confidences)
+            f.write(self.black_probabilities)
+            f.flush()
+            os.fsync(f.fileno())
+        # Replace atomically, a power loss must not leave a truncated calibration behind
+        os.replace(temporary, path)
+
+    def __compile(self) -> None:
+        """
+        Classifies the center of every quantization cell once.
+        """
+        white = self.centroids[WHITE]
+        black = self.centroids[BLACK]
+        direction = [w - b for w, b in zip(white, black)]
+        length = sum(d * d for d in direction)
+        max_distance = MAX_DISTANCE * MAX_DISTANCE * length
+        centroids = list(self.centroids.items())
+        size = 1 << QUANT_BITS
+        half = 1 << (QUANT_SHIFT - 1)
+
+        index = 0
+        for r in range(size):
+            for g in range(size):
+                for b in range(size):
+                    sample = ((r << QUANT_SHIFT) + half, (g << QUANT_SHIFT) + half, (b << QUANT_SHIFT) + half)
+
+                    # Nearest and second nearest centroid by squared distance
+                    nearest = second = None
+                    nearest_distance = second_distance = float("inf")
+                    for value, centroid in centroids:
+                        distance = sum((s - c) * (s - c) for s, c in zip(sample, centroid))
+                        if distance < nearest_distance:
+                            second, second_distance = nearest, nearest_distance
+                            nearest, nearest_distance = value, distance
+                        elif distance < second_distance:
+                            second, second_distance = value, distance
+
+                    if nearest_distance > max_distance:
+                        self.classes[index] = UNKNOWN
+                    else:
+                        self.classes[index] = nearest
+                        # 1 on a centroid, 0 half-way between the two nearest centroids
+                        ratio = (nearest_distance / second_distance) ** 0.5 if second_distance else 0.0
+                        self.confidences[index] = int(round(255 * (1 - ratio)))
+
+                    # Projection onto the line from black to white, 255 is black
+                    t = sum(d * (s - k) for d, s, k in zip(direction, sample, black)) / length
+                    self.black_probabilities[index] = int(round(255 * min(max(1 - t, 0.0), 1.0)))
+                    index += 1
+
+    @staticmethod
+    def index(sample: Tuple[int, int, int]) -> int:
+        """
+        Quantizes a raw sample into its lookup table index.
+
+        Args:
+            sample (tuple): Raw (red, green, blue) sample
+        Returns:
+            int: Index into the lookup tables
+        """
+        limit = (1 << QUANT_BITS) - 1
+        r = min(max(sample[0] >> QUANT_SHIFT, 0), limit)
+        g = min(max(sample[1] >> QUANT_SHIFT, 0), limit)
+        b = min(max(sample[2] >> QUANT_SHIFT, 0), limit)
+        return (((r << QUANT_BITS) | g) << QUANT_BITS) | b
+
+    def classify(self, sample: Tuple[int, int, int]) -> Tuple[Union[None, int], float]:
+        """
+        Classifies a raw sample with a single table lookup.
+
+        Args:
+            sample (tuple): Raw (red, green, blue) sample
+        Returns:
+            tuple: (WHITE, BLACK, RED or None, confidence between 0 and 1)
+        """
+        index = self.index(sample)
+        value = self.classes[index]
+        if value == UNKNOWN:
+            return None, 0.0
+        return value, self.confidences[index] / 255
+
+    def black_probability(self, sample: Tuple[int, int, int]) -> float:
+        """
+        Estimates the probability of a raw sample being black for soft-decision decoding.
+
+        Args:
+            sample (tuple): Raw (red, green, blue) sample
+        Returns:
+            float: Value between 0 and 1
+        """
+        return self.black_probabilities[self.index(sample)] / 255
+
+
+def majority_vote(read: Callable[[], Union[None, int]], samples: int) -> Tuple[Union[None, int], float]:
+    """
+    Classifies up to a number of samples taken in quick succession and votes on the result.
+
+    Sampling stops as soon as the remaining samples can no longer change the majority. On a tie the class
+    that reached the count first wins.
+
+    Args:
+        read (callable): Takes and classifies one sample, None if the color is unknown
+        samples (int): Maximum number of samples
+    Returns:
+        tuple: (majority class or None, fraction of the samples taken that agree with it)
+    """
+    leader = read()
+    votes = {leader: 1}
+    taken = 1
+    while taken < samples:
+        value = read()
+        taken += 1
+        votes[value] = votes.get(value, 0) + 1
+        if votes[value] > votes[leader]:
+            leader = value
+        runner_up = max((count for value, count in votes.items() if value != leader), default=0)
+        if votes[leader] > runner_up + samples - taken:
+            break  # The remaining samples can not change the result
+    return leader, votes[leader] / taken
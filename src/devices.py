@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+from clock import Clock
+
+
+# IMPORTANT NOTE: THE ev3dev.ev3 MODULE IS ONLY IMPORTED BY EV3Devices, ALL OTHER MODULES USE THE INTERFACES BELOW
+class Motor(ABC):
+    """
+    Tacho motor, positions are counted in tacho counts and speeds in tacho counts per second
+    """
+
+    @property
+    @abstractmethod
+    def position(self) -> int:
+        """
+        Returns:
+            int: Current position
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        Stops the motor and sets the current position to zero.
+        """
+
+    @abstractmethod
+    def run_forever(self, speed: int) -> None:
+        """
+        Runs the motor until stop() is called.
+
+        Args:
+            speed (int): Signed speed
+        """
+
+    @abstractmethod
+    def run_to_rel_pos(self, counts: int, speed: int) -> None:
+        """
+        Starts a move relative to the current position, the motor holds the target position afterwards.
+
+        Args:
+            counts (int): Relative target position, negative to move backwards
+            speed (int): Speed, the sign is ignored
+        """
+
+    @abstractmethod
+    def wait_until_idle(self, timeout: float) -> bool:
+        """
+        Waits until the motor is no longer running.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait
+        Returns:
+            bool: False if the motor is still running after the timeout
+        """
+
+    @abstractmethod
+    def stop(self) -> None:
+        """
+        Stops the motor and holds its position.
+        """
+
+
+class ColorSensor(ABC):
+    """
+    Color sensor in raw RGB mode
+    """
+
+    @abstractmethod
+    def read_rgb(self) -> Tuple[int, int, int]:
+        """
+        Returns:
+            tuple: Raw (red, green, blue) sample
+        """
+
+
+class Sound(ABC):
+    """
+    Text-to-speech output
+    """
+
+    @abstractmethod
+    def speak(self, text: str) -> None:
+        """
+        Speaks the text and waits until it has been played.
+
+        Args:
+            text (str): Text to speak
+        """
+
+    def render(self, text: str):
+        """
+        Synthesizes the text once so that it can be played repeatedly by play(). Backends that can not keep
+        synthesized audio return the text itself.
+
+        Args:
+            text (str): Text to speak
+        Returns:
+            Audio of the text in a form accepted by play()
+        """
+        return text
+
+    def play(self, audio) -> None:
+        """
+        Plays audio returned by render() and waits until it has been played.
+
+        Args:
+            audio: Audio returned by render()
+        """
+        self.speak(audio)
+
+    def discard(self, audio) -> None:
+        """
+        Releases audio returned by render() that will not be played again.
+
+        Args:
+            audio: Audio returned by render()
+        """
+        pass
+
+
+class Buttons(ABC):
+    """
+    Buttons of the brick
+    """
+
+    @abstractmethod
+    def wait_for_press(self) -> None:
+        """
+        Waits until any button has been pressed and released.
+        """
+
+
+class Devices:
+    """
+    The devices of the robot: sensor_motor, scroll_motor, color_sensor, sound and buttons, and the clock they run on
+    """
+    clock = None  # type: Clock
+    sensor_motor = None  # type: Motor
+    scroll_motor = None  # type: Motor
+    color_sensor = None  # type: ColorSensor
+    sound = None  # type: Sound
+    buttons = None  # type: Buttons
+
+
+class EV3Motor(Motor):
+    """
+    Motor backed by an ev3dev motor
+    """
+
+    def __init__(self, motor) -> None:
+        """
+        Initializes the class EV3Motor with all values necessary.
+
+        Args:
+            motor (ev3dev.ev3.Motor): Opened motor, ev3dev keeps its attribute files open between calls
+        """
+        self.motor = motor
+
+    @property
+    def position(self) -> int:
+        return self.motor.position
+
+    def reset(self) -> None:
+        self.motor.reset()
+
+    def run_forever(self, speed: int) -> None:
+        self.motor.speed_sp = speed
+        self.motor.command = "run-forever"
+
+    def run_to_rel_pos(self, counts: int, speed: int) -> None:
+        self.motor.stop_action = "hold"
+        self.motor.run_to_rel_pos(position_sp=counts, speed_sp=abs(speed))
+
+    def wait_until_idle(self, timeout: float) -> bool:
+        return self.motor.wait_while("running", timeout=int(timeout * 1000))
+
+    def stop(self) -> None:
+        self.motor.stop_action = "hold"
+        self.motor.stop()
+
+
+class EV3ColorSensor(ColorSensor):
+    """
+    Color sensor backed by the ev3dev color sensor, switched to RGB-RAW mode once
+    """
+
+    def __init__(self, sensor) -> None:
+        """
+        Initializes the class EV3ColorSensor with all values necessary.
+
+        Args:
+            sensor (ev3dev.ev3.ColorSensor): Opened color sensor
+        """
+        self.sensor = sensor
+        self.sensor.mode = 'RGB-RAW'
+
+    def read_rgb(self) -> Tuple[int, int, int]:
+        return self.sensor.bin_data("hhh")
+
+
+class EV3Sound(Sound):
+    """
+    Speech output of the EV3 brick, rendered audio is kept as wave files synthesized by espeak
+    """
+
+    def __init__(self, sound) -> None:
+        """
+        Initializes the class EV3Sound with all values necessary.
+
+        Args:
+            sound (ev3dev.ev3.Sound): Sound class of ev3dev
+        """
+        self.sound = sound
+        self.directory = tempfile.mkdtemp(prefix="speech")
+        self.rendered = 0
+
+    def speak(self, text: str) -> None:
+        self.sound.speak(text).wait()
+
+    def render(self, text: str) -> str:
+        self.rendered += 1
+        path = os.path.join(self.directory, "%d.wav" % self.rendered)
+        # Same voice options as ev3dev's Sound.speak()
+        subprocess.check_call(["espeak", "-a", "200", "-s", "130", "-w", path, "--", text])
+        return path
+
+    def play(self, audio: str) -> None:
+        self.sound.play(audio).wait()
+
+    def discard(self, audio: str) -> None:
+        os.remove(audio)
+
+
+class EV3Buttons(Buttons):
+    """
+    Buttons of the EV3 brick, polled on the clock
+    """
+
+    # Seconds between two polls of the buttons
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, button, clock: Clock) -> None:
+        """
+        Initializes the class EV3Buttons with all values necessary.
+
+        Args:
+            button (ev3dev.ev3.Button): Opened buttons of the brick
+            clock (Clock): Clock to wait on between polls
+        """
+        self.button = button
+        self.clock = clock
+
+    def wait_for_press(self) -> None:
+        while not self.button.any():
+            self.clock.sleep(self.POLL_INTERVAL)
+        while self.button.any():
+            self.clock.sleep(self.POLL_INTERVAL)
+
+
+class EV3Devices(Devices):
+    """
+    The motors on outA and outB, the color sensor and the speaker of the EV3 brick
+    """
+
+    def __init__(self) -> None:
+        """
+        Opens all devices of the brick.
+        """
+        import ev3dev.ev3 as ev3
+        self.clock = Clock()
+        self.sensor_motor = EV3Motor(ev3.LargeMotor("outA"))
+        self.scroll_motor = EV3Motor(ev3.LargeMotor("outB"))
+        self.color_sensor = EV3ColorSensor(ev3.ColorSensor())
+        self.sound = EV3Sound(ev3.Sound)
+        self.buttons = EV3Buttons(ev3.Button(), self.clock)
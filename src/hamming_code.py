@@ -1,8 +1,22 @@
 #!/usr/bin/env python3
 
+import logging
+import math
+import mmap
+import os
+import struct
+from array import array
 from enum import Enum
 from typing import List, Tuple, Union
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only HammingCode.decode_batch() needs it
+    np = None
+
+# Diagnostics are logged at DEBUG level and therefore disabled unless the application enables them
+logger = logging.getLogger(__name__)
+
 
 # IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
 class HCResult(Enum):
@@ -14,104 +28,480 @@ class HCResult(Enum):
     UNCORRECTABLE = 'ERROR'
 
 
+# Result codes returned by HammingCode.decode_batch(), indexes into this tuple
+RESULT_CODES = (HCResult.VALID, HCResult.CORRECTED, HCResult.UNCORRECTABLE)
+
+
+# Predefined non-systematic generator matrix G' of the (10, 6) code printed on the bar code cards
+DEFAULT_GENERATOR = ((1, 1, 1, 0, 0, 0, 0, 1, 0, 0),
+                     (0, 1, 0, 0, 1, 0, 0, 1, 0, 0),
+                     (1, 0, 0, 1, 0, 1, 0, 0, 0, 0),
+                     (0, 0, 0, 1, 0, 0, 1, 1, 0, 0),
+                     (1, 1, 0, 1, 0, 0, 0, 1, 1, 0),
+                     (1, 0, 0, 1, 0, 0, 0, 1, 0, 1))
+
+# Received words up to this length (n + 1 bits) are decoded through a full lookup table,
+# longer ones through a syndrome table of 2 ** r entries
+MAX_TABLE_BITS = 12
+
+# Minimum log-likelihood margin between the best and the second best codeword for a soft decision
+SOFT_DECISION_MARGIN = 1.0
+
+# Confidences are clamped to this distance from 0 and 1 before taking logarithms
+SOFT_DECISION_EPSILON = 1e-3
+
+# Header of a persisted decode table: magic, n, k, followed by the r row masks of H and the table entries
+TABLE_FILE_MAGIC = b"HCT1"
+TABLE_FILE_HEADER = struct.Struct("=4sBB")
+
+# Compiled matrices and tables of every code constructed in this process, keyed by its generator matrix
+_compiled_codes = {}
+
+
 class HammingCode:
     """
     Provides decoding capabilities for the specified Hamming Code
     """
 
-    def __init__(self):
+    def __init__(self, gns: List = None, table_file: str = None):
         """
         Initializes the class HammingCode with all values necessary.
+
+        Compiled tables are shared by all instances with the same generator matrix. If a table file is given,
+        the decode table is loaded from it, or compiled and written to it if it is missing or does not match.
+
+        Args:
+            gns (List): Generator matrix of the code, the predefined (10, 6) code if omitted
+            table_file (str): Optional path of a persisted decode table
         """
-        self.total_bits = 10  # n
-        self.data_bits = 6  # k
-        self.parity_bits = 4  # r
+        if gns is None:
+            gns = DEFAULT_GENERATOR
+        key = tuple(tuple(row) for row in gns)
+        compiled = _compiled_codes.get(key)
+        if compiled is not None:
+            self.__dict__.update(compiled)
+            # Compiled by another instance, which may have used a different table file or none
+            if table_file is not None and self.decode_int_table is not None and \
+                    self.__load_decode_table(table_file) is None:
+                self.__save_decode_table(table_file)
+            return
 
-        # Predefined non-systematic generator matrix G'
-        gns = [[1, 1, 1, 0, 0, 0, 0, 1, 0, 0],
-               [0, 1, 0, 0, 1, 0, 0, 1, 0, 0],
-               [1, 0, 0, 1, 0, 1, 0, 0, 0, 0],
-               [0, 0, 0, 1, 0, 0, 1, 1, 0, 0],
-               [1, 1, 0, 1, 0, 0, 0, 1, 1, 0],
-               [1, 0, 0, 1, 0, 0, 0, 1, 0, 1]]
+        self.total_bits = len(gns[0])  # n
+        self.data_bits = len(gns)  # k
+        self.parity_bits = self.total_bits - self.data_bits  # r
 
         # Convert non-systematic G' into systematic matrices G, H
         self.g = self.__convert_to_g(gns)
         self.h = self.__derive_h(self.g)
 
+        # Bit masks for the packed integer interface
+        self.__build_masks(self.h, self.g)
+
+        # All valid codewords, ranked against per-bit confidences by decode_soft()
+        self.codebook = None
+        self.codebook_ones = None
+        if self.data_bits <= MAX_TABLE_BITS:
+            self.__build_codebook()
+
+        # Every possible received word (n + 1 bits including the overall parity) mapped to its decode result,
+        # once with packed data words for decode_int() and once with data tuples for decode()
+        self.decode_int_table = None
+        self.decode_table = None
+        if self.total_bits + 1 <= MAX_TABLE_BITS:
+            if table_file is not None:
+                self.decode_int_table = self.__load_decode_table(table_file)
+            if self.decode_int_table is None:
+                self.decode_int_table = self.__build_decode_table()
+                if table_file is not None:
+                    self.__save_decode_table(table_file)
+            self.decode_table = [(self.__to_tuple(data, self.data_bits), result)
+                                 for data, result in self.decode_int_table]
+
+        _compiled_codes[key] = dict(self.__dict__)
+
+    @classmethod
+    def from_parameters(cls, total_bits: int, data_bits: int) -> 'HammingCode':
+        """
+        Creates a (shortened) Hamming Code with the given number of total and data bits.
+
+        Args:
+            total_bits (int): Number of bits per codeword without the overall parity bit (n)
+            data_bits (int): Number of data bits per codeword (k)
+        Returns:
+            HammingCode: Code with a systematic generator matrix
+        """
+        parity_bits = total_bits - data_bits
+        # The parity part of each row must have a weight of at least two to keep the columns of H distinct
+        candidates = [value for value in range(1, 1 << parity_bits) if bin(value).count("1") >= 2]
+        if data_bits < 1 or len(candidates) < data_bits:
+            raise ValueError("No single error correcting code with n = %d and k = %d" % (total_bits, data_bits))
+
+        gns = []
+        for i, value in enumerate(candidates[:data_bits]):
+            row = [0] * total_bits
+            row[i] = 1
+            for j in range(parity_bits):
+                row[data_bits + j] = (value >> (parity_bits - 1 - j)) & 1
+            gns.append(row)
+        return cls(gns)
+
     def __convert_to_g(self, gns: List):
         """
-        Converts a non-systematic generator matrix into a systematic
+        Converts a non-systematic generator matrix into a systematic one by Gaussian elimination over GF(2).
 
         Args:
             gns (List): Non-systematic generator matrix
         Returns:
             list: Converted systematic generator matrix
         """
+        g = [list(row) for row in gns]
+        for column in range(self.data_bits):
+            # Find a row with a one in the current column and move it into place
+            pivot = column
+            while pivot < self.data_bits and g[pivot][column] == 0:
+                pivot += 1
+            if pivot == self.data_bits:
+                raise ValueError("Generator matrix can not be converted into systematic form")
+            g[column], g[pivot] = g[pivot], g[column]
 
-        # REPLACE "pass" WITH YOUR IMPLEMENTATION
-        for i in range(10):
-            gns[2][i] = gns[2][i] ^ gns[0][i]
-            gns[4][i] = gns[4][i] ^ gns[0][i]
-            gns[5][i] = gns[5][i] ^ gns[0][i]  # Subtracting row 1 from: row 3, row 5, row 6
-        for i in range(10):
-            gns[0][i] = gns[0][i] ^ gns[1][i]
-            gns[2][i] = gns[2][i] ^ gns[1][i]
-            gns[5][i] = gns[5][i] ^ gns[1][i]  # Subtracting row 2 from: row 1, row 3, row 6
-        for i in range(10):
-            gns[0][i] = gns[0][i] ^ gns[2][i]
-            gns[4][i] = gns[4][i] ^ gns[2][i]
-            gns[5][i] = gns[5][i] ^ gns[2][i]  # Subtracting row 3 from: row 1, row 5, row 6
-        for i in range(10):
-            gns[0][i] = gns[0][i] ^ gns[3][i]
-            gns[2][i] = gns[2][i] ^ gns[3][i]  # Subtracting row 4 from: row 1, row 3
-        for i in range(10):
-            gns[1][i] = gns[1][i] ^ gns[4][i]
-            gns[2][i] = gns[2][i] ^ gns[4][i]  # Subtracting row 5 from: row 2, row 3
-        for i in range(10):
-            gns[0][i] = gns[0][i] ^ gns[5][i]
-            gns[1][i] = gns[1][i] ^ gns[5][i]
-            gns[4][i] = gns[4][i] ^ gns[5][i]  # Subtracting row 6 from: row 1, row 2, row 5
-
-        list = []
-        list = gns
-        return list
+            # Subtract the pivot row from every other row with a one in the current column
+            for i in range(self.data_bits):
+                if i != column and g[i][column]:
+                    g[i] = [a ^ b for a, b in zip(g[i], g[column])]
+        return g
 
     def __derive_h(self, g: List):
-
         """
         This method executes all steps necessary to derive H from G.
 
         Args:
-            g (List):
+            g (List): Systematic generator matrix G = (I_k | P)
+        Returns:
+            list: Systematic parity-check matrix H = (P^T | I_r)
+        """
+        k = self.data_bits
+        r = self.parity_bits
+        h = []
+        for j in range(r):
+            row = [g[i][k + j] for i in range(k)] + [0] * r
+            row[k + j] = 1
+            h.append(row)
+        return h
+
+    @staticmethod
+    def __to_tuple(word: int, bits: int) -> Tuple[int, ...]:
+        """
+        Unpacks an integer word into a tuple of bits, MSB first.
+
+        Args:
+            word (int): Packed word
+            bits (int): Length of the word
+        Returns:
+            tuple: bits-tuple
+        """
+        return tuple((word >> (bits - 1 - j)) & 1 for j in range(bits))
+
+    def __build_masks(self, h: List, g: List) -> None:
+        """
+        Packs the rows of H and the parity columns of G into integer bit masks (MSB first).
+
+        Args:
+            h (List): Systematic parity-check matrix H
+            g (List): Systematic generator matrix G
+        """
+        n = self.total_bits
+        k = self.data_bits
+
+        # One n-bit mask per row of H, the parity of (codeword & mask) is one syndrome bit
+        self.h_masks = []
+        for row in h:
+            mask = 0
+            for bit in row:
+                mask = (mask << 1) | bit
+            self.h_masks.append(mask)
+
+        # One k-bit mask per parity column of G, the parity of (data word & mask) is one parity bit
+        self.g_masks = []
+        for j in range(k, n):
+            mask = 0
+            for i in range(k):
+                mask = (mask << 1) | g[i][j]
+            self.g_masks.append(mask)
+
+        # Syndrome of a single bit error at each of the n positions
+        self.error_syndromes = [self.syndrome(1 << (n - position)) for position in range(n)]
+        if 0 in self.error_syndromes or len(set(self.error_syndromes)) < n:
+            raise ValueError("The columns of H must be nonzero and distinct to correct single errors")
+
+        # Error position for every possible syndrome, -1 if it matches no column of H
+        self.syndrome_positions = [-1] * (1 << self.parity_bits)
+        for position, syndrome in enumerate(self.error_syndromes):
+            self.syndrome_positions[syndrome] = position
+
+    def __build_codebook(self) -> None:
+        """
+        Encodes every data word once and records the positions of the ones in each codeword.
+        """
+        n = self.total_bits
+        self.codebook = [self.encode_int(word) for word in range(1 << self.data_bits)]
+        self.codebook_ones = [tuple(j for j in range(n + 1) if (codeword >> (n - j)) & 1)
+                              for codeword in self.codebook]
+        # Minimum distance of the extended code, the weight of the lightest nonzero codeword
+        self.min_distance = min(len(ones) for ones in self.codebook_ones[1:])
+
+    def __require_codebook(self) -> None:
+        """
+        Raises a ValueError if the code has too many data bits for the codebook to be built.
+        """
+        if self.codebook is None:
+            raise ValueError("Erasure and soft-decision decoding need a codebook, which is only built for up to %d "
+                             "data bits, not %d" % (MAX_TABLE_BITS, self.data_bits))
+
+    def __decode_word(self, codeword: int) -> Tuple[int, HCResult]:
+        """
+        Decodes a single packed received word from its syndrome and overall parity.
+
+        Args:
+            codeword (int): (n + 1)-bit codeword, MSB first, overall parity in the least significant bit
+        Returns:
+            tuple: (k-bit data word, HCResult), the data bits are returned uncorrected if UNCORRECTABLE
+        """
+        parity = bin(codeword).count("1") & 1
+        syndrome = self.syndrome(codeword)
+        data = codeword >> (self.parity_bits + 1)
+
+        if syndrome == 0:
+            # Either no error at all or a single error in the overall parity bit
+            return data, HCResult.VALID if parity == 0 else HCResult.CORRECTED
+        position = self.syndrome_positions[syndrome]
+        if parity == 1 and position >= 0:
+            # Single error, flip the data bit if it is not one of the parity bits
+            if position < self.data_bits:
+                data ^= 1 << (self.data_bits - 1 - position)
+            return data, HCResult.CORRECTED
+        # Double error, or an odd number of errors that does not map onto a single position
+        return data, HCResult.UNCORRECTABLE
+
+    def __build_decode_table(self) -> List:
+        """
+        Decodes every possible received word once so that decode_int() becomes a single index lookup.
+
+        Returns:
+            list: (data word, HCResult) for each of the 2 ** (n + 1) received words
+        """
+        return [self.__decode_word(codeword) for codeword in range(1 << (self.total_bits + 1))]
+
+    def __load_decode_table(self, path: str) -> Union[None, List]:
+        """
+        Memory-maps a persisted decode table and checks that it belongs to this code.
+
+        Args:
+            path (str): Path of the table file
+        Returns:
+            Union: list of (data word, HCResult) like __build_decode_table(), or None if missing or mismatched
+        """
+        offset = TABLE_FILE_HEADER.size + 2 * self.parity_bits
+        size = 1 << (self.total_bits + 1)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) != offset + 2 * size:
+                    return None
+                magic, n, k = TABLE_FILE_HEADER.unpack_from(mapped)
+                masks = struct.unpack_from("=%dH" % self.parity_bits, mapped, TABLE_FILE_HEADER.size)
+                if (magic, n, k, list(masks)) != (TABLE_FILE_MAGIC, self.total_bits, self.data_bits, self.h_masks):
+                    return None
+                with memoryview(mapped) as view, view[offset:].cast("H") as entries:
+                    # Each entry holds the data word and the index into RESULT_CODES in its two lowest bits
+                    return [(entry >> 2, RESULT_CODES[entry & 3]) for entry in entries]
+        except (OSError, ValueError):
+            return None
+
+    def __save_decode_table(self, path: str) -> None:
+        """
+        Writes the decode table to a file that can be memory-mapped by __load_decode_table().
+
+        Args:
+            path (str): Path of the table file
+        """
+        entries = array("H", [(data << 2) | RESULT_CODES.index(result) for data, result in self.decode_int_table])
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(TABLE_FILE_HEADER.pack(TABLE_FILE_MAGIC, self.total_bits, self.data_bits))
+            f.write(struct.pack("=%dH" % self.parity_bits, *self.h_masks))
+            f.write(entries.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # Replace atomically, a power loss must not leave a truncated table behind
+        os.replace(temporary, path)
+
+    def syndrome(self, codeword: int) -> int:
+        """
+        Calculates the syndrome of a packed codeword.
+
+        Args:
+            codeword (int): (n + 1)-bit codeword, MSB first, overall parity in the least significant bit
+        Returns:
+            int: r-bit syndrome, 0 if the first n bits form a valid codeword
+        """
+        syndrome = 0
+        for mask in self.h_masks:
+            syndrome = (syndrome << 1) | (bin((codeword >> 1) & mask).count("1") & 1)
+        return syndrome
+
+    def encode_int(self, source_word: int) -> int:
+        """
+        Encodes the given packed word and returns the packed codeword.
+
+        Args:
+            source_word (int): k-bit data word, MSB first
+        Returns:
+            int: (n + 1)-bit codeword, MSB first, overall parity in the least significant bit
+        """
+        codeword = source_word
+        for mask in self.g_masks:
+            codeword = (codeword << 1) | (bin(source_word & mask).count("1") & 1)
+        return (codeword << 1) | (bin(codeword).count("1") & 1)
+
+    def decode_int(self, encoded_word: int) -> Tuple[int, HCResult]:
+        """
+        Checks the packed codeword for errors and attempts to decode it.
+
+        Args:
+            encoded_word (int): (n + 1)-bit codeword, MSB first, overall parity in the least significant bit
+        Returns:
+            tuple: (k-bit data word, HCResult), the data bits are returned uncorrected if UNCORRECTABLE
+        """
+        if self.decode_int_table is not None:
+            result = self.decode_int_table[encoded_word]
+        else:
+            result = self.__decode_word(encoded_word)
+        logger.debug("Received word %s decoded as %s", encoded_word, result)
+        return result
+
+    def decode_batch(self, encoded_words) -> Tuple:
+        """
+        Checks a whole batch of channel alphabet words for errors and attempts to decode them.
+
+        All syndromes are calculated with a single matrix product mod 2 against H. Requires numpy.
+
+        Args:
+            encoded_words (numpy.ndarray): (N, n + 1) array of bits or (N,) array of packed codewords
+        Returns:
+            tuple: (N, k) uint8 array of data bits and (N,) uint8 array of indexes into RESULT_CODES
+        """
+        if np is None:
+            raise ImportError("decode_batch() requires numpy")
+
+        n = self.total_bits
+        k = self.data_bits
+        r = self.parity_bits
+
+        words = np.asarray(encoded_words)
+        if words.ndim == 1:
+            bits = ((words[:, np.newaxis] >> np.arange(n, -1, -1)) & 1).astype(np.uint8)
+        elif words.ndim == 2 and words.shape[1] == n + 1:
+            bits = words.astype(np.uint8, copy=False)
+        else:
+            raise ValueError("Expected an (N, %d) bit array or an (N,) array of packed codewords" % (n + 1))
+
+        h = np.array(self.h, dtype=np.uint8)
+        syndrome_bits = (bits[:, :n] @ h.T) & 1
+        syndromes = syndrome_bits @ (1 << np.arange(r - 1, -1, -1))
+        parity = bits.sum(axis=1) & 1
+
+        error_positions = np.array(self.syndrome_positions, dtype=np.intp)[syndromes]
+
+        data = bits[:, :k].copy()
+        flip = (parity == 1) & (error_positions >= 0) & (error_positions < k)
+        rows = np.nonzero(flip)[0]
+        data[rows, error_positions[rows]] ^= 1
+
+        results = np.full(len(bits), RESULT_CODES.index(HCResult.UNCORRECTABLE), dtype=np.uint8)
+        results[(parity == 1) & ((syndromes == 0) | (error_positions >= 0))] = RESULT_CODES.index(HCResult.CORRECTED)
+        results[(parity == 0) & (syndromes == 0)] = RESULT_CODES.index(HCResult.VALID)
+        return data, results
+
+    def decode_erasures(self, encoded_word: Tuple[Union[None, int], ...]) -> Tuple[Union[None, Tuple[int, ...]], HCResult]:
+        """
+        Decodes a channel alphabet word in which unreadable bits are marked as erasures.
+
+        A word with e erasures and t errors among the known bits is corrected as long as 2t + e is smaller than
+        the minimum distance of the code, e.g. up to three erasures, or one erasure and one error.
+
+        Args:
+            encoded_word (tuple): n-tuple, None at every erased position
         Returns:
-            list:
-        """
-        g_matrix = [[1, 0, 0, 0, 0, 0, 1, 0, 0, 1],
-                    [0, 1, 0, 0, 0, 0, 0, 0, 1, 1],
-                    [0, 0, 1, 0, 0, 0, 1, 1, 1, 0],
-                    [0, 0, 0, 1, 0, 0, 1, 1, 0, 0],
-                    [0, 0, 0, 0, 1, 0, 0, 1, 1, 1],
-                    [0, 0, 0, 0, 0, 1, 0, 1, 0, 1]]
-        parity_matrix = [g_matrix[0][6:],
-                         g_matrix[1][6:],
-                         g_matrix[2][6:],
-                         g_matrix[3][6:],
-                         g_matrix[4][6:],
-                         g_matrix[5][6:]]
-
-        transpose_matrix = [[0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]]
-        for i in range(6):
-            for j in range(4):
-                transpose_matrix[j][i] = parity_matrix[i][j]
-        list = [[0, 0, 0, 0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0, 1]]
-
-        for i in range(4):
-            for j in range(6):
-                list[i][j] = transpose_matrix[i][j]
-
-        return list
+            Union: (m-tuple, HCResult) or (None, HCResult) if the erasures and errors can not be resolved
+        """
+        erasures = encoded_word.count(None)
+        if erasures == 0:
+            return self.decode(encoded_word)
+        self.__require_codebook()
+
+        # Compare only the known positions against every valid codeword
+        known = 0
+        known_mask = 0
+        for bit in encoded_word:
+            known = (known << 1) | (bit or 0)
+            known_mask = (known_mask << 1) | (bit is not None)
+
+        best_distance = self.total_bits + 2
+        best_word = 0
+        for word, codeword in enumerate(self.codebook):
+            distance = bin((codeword ^ known) & known_mask).count("1")
+            if distance < best_distance:
+                best_distance = distance
+                best_word = word
+
+        if 2 * best_distance + erasures < self.min_distance:
+            result = self.__to_tuple(best_word, self.data_bits), HCResult.CORRECTED
+        else:
+            result = None, HCResult.UNCORRECTABLE
+        logger.debug("Received word %s decoded as %s", encoded_word, result)
+        return result
+
+    def decode_soft(self, confidences: Tuple[Union[None, float], ...]) -> Tuple[Union[None, Tuple[int, ...]], HCResult]:
+        """
+        Picks the most likely valid codeword for the given per-bit confidences (soft-decision decoding).
+
+        Args:
+            confidences (tuple): (n + 1)-tuple with the probability of each bit being 1, None if unknown
+        Returns:
+            Union: (m-tuple, HCResult), UNCORRECTABLE with the data bits of the best candidate if the best
+            and the second best codeword are closer than SOFT_DECISION_MARGIN
+        """
+        self.__require_codebook()
+        # Log-likelihood ratio of each bit, the score of a codeword is the sum over its ones
+        llr = []
+        hard_word = 0
+        for confidence in confidences:
+            if confidence is None:
+                confidence = 0.5
+            confidence = min(max(confidence, SOFT_DECISION_EPSILON), 1 - SOFT_DECISION_EPSILON)
+            llr.append(math.log(confidence / (1 - confidence)))
+            hard_word = (hard_word << 1) | (confidence > 0.5)
+
+        best = second = -math.inf
+        best_word = 0
+        for word, ones in enumerate(self.codebook_ones):
+            score = 0.0
+            for j in ones:
+                score += llr[j]
+            if score > best:
+                best, second = score, best
+                best_word = word
+            elif score > second:
+                second = score
+
+        data = self.__to_tuple(best_word, self.data_bits)
+        if best - second < SOFT_DECISION_MARGIN:
+            result = HCResult.UNCORRECTABLE
+        elif self.codebook[best_word] == hard_word:
+            result = HCResult.VALID
+        else:
+            result = HCResult.CORRECTED
+        logger.debug("Confidences %s decoded as %s", confidences, (data, result))
+        return data, result
 
     def encode(self, source_word: Tuple[int, ...]) -> Tuple[int, ...]:
         """
@@ -122,104 +512,34 @@ class HammingCode:
         Returns:
             tuple: n-tuple (length depends on number of total bits)
         """
-        global tuple
-        test = []
-        G_Matrix = (
-        (1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 1), (0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 1), (0, 0, 1, 0, 0, 0, 1, 1, 1, 0, 0),
-        (0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1), (0, 0, 0, 0, 1, 0, 0, 1, 1, 1, 0),
-        (0, 0, 0, 0, 0, 1, 0, 1, 0, 1, 1))
-        for i in range(11):
-            total = 0
-            x = 0
-            for j in range(6):
-                total = source_word[j] * G_Matrix[j][i]
-                if (j == 0):
-                    x = total
-                else:
-                    x = x ^ total
-            test.append(x)
-        test_2 = tuple(test)
-        print("Encoded word is", test_2)
-        return test_2
+        word = 0
+        for bit in source_word:
+            word = (word << 1) | bit
+        codeword = self.encode_int(word)
+        encoded_word = self.__to_tuple(codeword, self.total_bits + 1)
+        logger.debug("Encoded word is %s", encoded_word)
+        return encoded_word
 
     def decode(self, encoded_word: Tuple[int, ...]) -> Tuple[Union[None, Tuple[int, ...]], HCResult]:
         """
-        Checks the channel alphabet word for errors and attempts to decode it.
+        Checks the channel alphabet word for errors and attempts to decode it. A ValueError is raised unless the
+        word has n + 1 bits, each 0 or 1.
         Args:
-            encoded_word (tuple): n-tuple (length depends on number of total bits)
+            encoded_word (tuple): (n + 1)-tuple including the overall parity bit
         Returns:
             Union: (m-tuple, HCResult) or (None, HCResult)(length depends on number of data bits)
         """
-        parity_1 = 0
-        for i in range(11):
-            parity_1 = parity_1 ^ encoded_word[i]
-        print("overall parity is", parity_1)
-        res_1 = []
-        msw = []
-        for i in range(10):
-            res_1.append(encoded_word[i])
-            if (i < 6):
-                msw.append(encoded_word[i])
-        print(res_1)
-        print(msw)
-        synd = []
-        H_Matrix = [[1, 0, 0, 1],
-                    [0, 0, 1, 1],
-                    [1, 1, 1, 0],
-                    [1, 1, 0, 0],
-                    [0, 1, 1, 1],
-                    [0, 1, 0, 1],
-                    [1, 0, 0, 0],
-                    [0, 1, 0, 0],
-                    [0, 0, 1, 0],
-                    [0, 0, 0, 1]]
-        for i in range(4):
-            total = 0
-            x = 0
-            for j in range(10):
-                total = res_1[j] * H_Matrix[j][i]
-                if (j == 0):
-                    x = total
-                else:
-                    x = x ^ total
-            synd.append(x)
-        print("The syndrome is ",synd)
-
-        synd_total = 0
-        for i in range(4):
-            synd_total = synd_total + synd[i]
-        if (parity_1 == 0):
-            if (synd_total == 0):
-                print("Zero errors")
-                print("Decoded word is ", msw)
-                Union = (*msw,)
-                print(Union)
-                return Union, HCResult.VALID
-        if (parity_1 == 1):
-            if (synd_total == 0):
-                print("Error is in the parity bit")
-                print("Decoded word is", msw)
-                Union = (*msw,)
-                print(Union)
-                return Union, HCResult.CORRECTED
-        if (parity_1 == 1):
-            if (synd_total != 0):
-                print("Single error")
-                for i in range(10):
-                    if (synd == H_Matrix[i]):
-                        print("Error is in position =", i)
-                        if (i < 6):
-                            if (msw[i] == 0):
-                                msw[i] = 1
-                            else:
-                                msw[i] = 0
-                print("Corrected decoded word is", msw)
-                Union = (*msw,)
-                print(Union)
-                return Union, HCResult.CORRECTED
-        if (parity_1 == 0):
-            if (synd_total != 0):
-                print("Multiple errors")
-                print("Decoded word is ", msw)
-                Union = (*msw,)
-                return Union, HCResult.UNCORRECTABLE
+        if len(encoded_word) != self.total_bits + 1:
+            raise ValueError("Expected %d bits, got %d" % (self.total_bits + 1, len(encoded_word)))
+        index = 0
+        for bit in encoded_word:
+            if bit != 0 and bit != 1:
+                raise ValueError("Bits must be 0 or 1, got %r" % (encoded_word,))
+            index = (index << 1) | bit
+        if self.decode_table is not None:
+            result = self.decode_table[index]
+        else:
+            data, status = self.__decode_word(index)
+            result = self.__to_tuple(data, self.data_bits), status
+        logger.debug("Received word %s decoded as %s", encoded_word, result)
+        return result
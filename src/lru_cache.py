@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Entries kept by default
+LRU_CACHE_CAPACITY = 256
+
+
+class LRUCache:
+    """
+    Bounded least recently used cache with hit and miss counters
+    """
+
+    def __init__(self, capacity: int = LRU_CACHE_CAPACITY, release: Callable = None, name: str = "cache") -> None:
+        """
+        Initializes the class LRUCache with all values necessary.
+
+        Args:
+            capacity (int): Number of entries kept, the least recently used one is evicted beyond that
+            release (callable): Called with every evicted entry, e.g. to delete a file it refers to
+            name (str): Name printed in front of the report
+        """
+        self.capacity = capacity
+        self.release = release
+        self.name = name
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable):
+        """
+        Looks up an entry and marks it as most recently used.
+
+        Args:
+            key: Key the entry was stored under
+        Returns:
+            The cached entry, or None if there is none
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, entry) -> None:
+        """
+        Stores an entry, evicting the least recently used one if the cache is full.
+
+        Args:
+            key: Key to store the entry under
+            entry: Value returned by get() for the key, must not be None
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            key, evicted = self.entries.popitem(last=False)
+            self.evictions += 1
+            if self.release is not None:
+                self.release(evicted)
+
+    def hit_rate(self) -> float:
+        """
+        Returns:
+            float: Share of the lookups that were answered from the cache, 0 before the first lookup
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Size, hits, misses, evictions and hit rate in one line
+        """
+        return "%s %d/%d entries, %d hits, %d misses, %d evictions, hit rate %.1f%%" % (
+            self.name, len(self.entries), self.capacity, self.hits, self.misses, self.evictions, 100 * self.hit_rate())
+
+    def __len__(self) -> int:
+        return len(self.entries)
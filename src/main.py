@@ -1,107 +1,81 @@
 #!/usr/bin/env python3
 
+from checkpoint import Checkpoint
+from devices import Devices, EV3Devices
 from hamming_code import HammingCode
+from pipeline import Pipeline, StageTimer
 from stack_machine import StackMachine
+from tracer import RingTracer
+from speech import RenderedSpeech, SpeechQueue
 from robot import *
-import ev3dev.ev3 as ev3
+import os
 
+# Compiled decode table persisted on the brick so it is not rebuilt on every boot
+HAMMING_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hamming.tbl")
 
-def run():
-    # the execution of all code shall be started from within this function
-    r=Robot()
-    tr=StackMachine()
-    h=HammingCode()
-    counter=0
-    while counter<5:                                #Loop for constantly calibrating with red
-        while r.read_value()==5:
-            print("Red detected ",r.read_value())
-            time.sleep(8)
-            i=0
-            flag=False
-            list_1=[]
-            tup_1=()
-            for i in range(11):                      #Reads a line 
-                r.sensor_step()
-                t=r.read_value()
-                if t==None:
-                    flag=True
-                list_1.append(t)
-                print ("Read bit is",t)
-                print(i)
-            time.sleep(2)
-            r.sensor_reset()                       #Resets sensor to initial position
-            if flag==True:                                        #Re reading line in case of WRONG value detected
-                print("Re reading line because of None ")
-                time.sleep(15)
-                list_1=[]
-                for i in range(11):
-                    r.sensor_step()
-                    t=r.read_value()
-                    list_1.append(t)
-                    print ("Read bit is",t)
-                    print(i)
-                time.sleep(2)
-                r.sensor_reset()  
-            tup_1=tuple(list_1)
-            print(list_1)
-            print(tup_1)
-            ev3.Sound.speak("eleven bit input is").wait()             #Printing 11 bit encoded word read my barcode sensor
-            ev3.Sound.speak(tup_1).wait()
-            out_tuple=()
-            out_tuple=h.decode(tup_1)
-            print(out_tuple)
-            if out_tuple[1] == 'ERROR':               #Re reading line in case of Uncorrectable code
-                print("Re reading line because of Uncorrectable code ")
-                time.sleep(2)
-                list_1=[]
-                for i in range(11):
-                    r.sensor_step()
-                    t=r.read_value()
-                    list_1.append(t)
-                    print ("Read bit is",t)
-                    print(i)
-                time.sleep(2)
-                r.sensor_reset()  
-            print(" The Opcode is",out_tuple)                       #Printing 6 bit output of decode from HammingCode
-            ev3.Sound.speak("six bit output is").wait()
-            ev3.Sound.speak(out_tuple[0]).wait()
-            time.sleep(3)
-            tr.do(out_tuple[0])                                    #Executing StackMACHINE
-            print("THE TOP ELEMENT OF STACK IS")                   #Printing top element of Stack
-            print(tr.top())
-            time.sleep(2)
-            print("Execution finished for One line")               #Execution finished for One line
-            time.sleep(4)
-            r.scroll_step()                                        #Scroller motor works to move to next line
-        time.sleep(5)
-        continue
-
-        
-    
- 
-    
-    
-    
-    
-    
-    
-   
-
+# Centroids and lookup tables of the color classifier, written by calibrate()
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "colors.cal")
 
+# Journal of the executed code words and snapshots of the stack, a restarted run resumes the deck from there
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoint")
 
-   
+# Sample white, black and red patches before the first card, the stored calibration or the hard-coded ranges are used otherwise
+CALIBRATE = False
 
+# Read each line in one continuous sweep instead of stepping the sensor from bit to bit
+SWEEP_SCANNING = False
 
-    
-    
+# Samples voted on per bit when stepping from bit to bit, a few milliseconds each instead of a rescan of the line
+BURST_SAMPLES = 5
 
+# Read every other line from right to left instead of resetting the sensor after each line
+BIDIRECTIONAL_SCANNING = False
 
+# Record every executed code word and report per-opcode counts and latencies after every card
+TRACE_EXECUTION = False
 
-   
-
-
+# Persist the stack machine after every code word so that a power loss or a restart does not lose the deck
+CHECKPOINTING = True
 
 
+def run(devices: Devices = None, cards: int = None):
+    # the execution of all code shall be started from within this function
+    # devices: the motors, sensor, speaker and clock of the EV3 brick if omitted, or e.g. simulator.SimulatedDevices
+    # cards: number of cards to process before returning, run forever if omitted
+    if devices is None:
+        devices=EV3Devices()
+    timer=StageTimer(devices.clock)                 #Stage and per-bit sensor latency, reported after every card
+    r=Robot(timer, CALIBRATION_FILE, devices)
+    if CALIBRATE:                                   #Learned thresholds replace the hard-coded color ranges
+        r.calibrate()
+    speech=RenderedSpeech(devices.sound)            #Repeated announcements are played without synthesizing them again
+    speaker=SpeechQueue(speak=speech)               #Announcements are spoken while the next line is scanned
+    tracer=RingTracer() if TRACE_EXECUTION else None
+    tr=StackMachine(speaker, tracer)
+    h=HammingCode(table_file=HAMMING_TABLE_FILE)
+    checkpoint=Checkpoint(CHECKPOINT_DIR, tr) if CHECKPOINTING else None
+    line=0
+    if checkpoint is not None:
+        card,line=checkpoint.restore()              #Stack of the interrupted run, the card is reinserted from its start
+        if card or line:
+            print("Resuming card", card, "at line", line)
+    pipeline=Pipeline(r, h, tr, speaker, sweep=SWEEP_SCANNING,
+                      bidirectional=BIDIRECTIONAL_SCANNING, samples=BURST_SAMPLES, timer=timer, clock=devices.clock,
+                      checkpoint=checkpoint)        #Executes line N while line N + 1 is scanned
+    done=0
+    while cards is None or done<cards:              #Loop for constantly calibrating with red
+        if pipeline.run(start_line=line):           #0 if no card is in the slot yet
+            if checkpoint is not None:
+                checkpoint.end_card()
+            line=0                                  #Lines are only skipped on the card that was interrupted
+            if tracer is not None:
+                print(tracer.report(tr.opcode_names()))
+            print(speech.cache.report())
+            done+=1
+        devices.clock.sleep(5)                      #Virtual on simulated devices
+    if checkpoint is not None:
+        checkpoint.close()
+    speaker.close()
 
 
 if __name__ == '__main__':
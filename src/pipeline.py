@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple, Union
+
+from checkpoint import Checkpoint
+from clock import Clock
+from hamming_code import HammingCode, HCResult
+from speech import SpeechQueue
+from stack_machine import SMState, StackMachine
+from sweep import recover_bits
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Bits of a burst read on which fewer samples agree are treated as unknown (erasures)
+MIN_AGREEMENT = 0.6
+
+
+def render_announcement(values: Tuple, word: Union[None, Tuple[int, ...]]) -> Tuple[str, ...]:
+    """
+    Renders the texts announced for a line.
+
+    Args:
+        values (tuple): Hard values of the line as read
+        word (tuple): Decoded m-tuple, None if the line could not be decoded
+    Returns:
+        tuple: Texts to speak in order
+    """
+    return "eleven bit input is", str(values), "six bit output is", str(word) if word is not None else "error"
+
+
+class StageTimer:
+    """
+    Accumulates the wall time spent in each stage of the pipeline
+    """
+
+    def __init__(self, clock: Clock = None) -> None:
+        """
+        Initializes the class StageTimer with all values necessary.
+
+        Args:
+            clock (Clock): Clock to measure with, the wall clock if omitted; a VirtualClock gives the would-be wall time
+        """
+        self.stages = {}  # name -> [count, total seconds, maximum seconds]
+        self.lock = threading.Lock()
+        self.clock = clock if clock is not None else Clock()
+
+    @contextmanager
+    def measure(self, stage: str):
+        """
+        Measures the wall time of the enclosed block and adds it to the stage.
+
+        Args:
+            stage (str): Name of the stage
+        """
+        start = self.clock.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = self.clock.monotonic() - start
+            with self.lock:
+                entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+
+    def report(self) -> str:
+        """
+        Formats count, total, mean and maximum time of every stage, the slowest stage first.
+
+        Returns:
+            str: One line per stage
+        """
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][1], reverse=True)
+        lines = ["%-10s %5s %10s %10s %10s" % ("stage", "count", "total s", "mean s", "max s")]
+        for stage, (count, total, maximum) in stages:
+            lines.append("%-10s %5d %10.3f %10.3f %10.3f" % (stage, count, total, total / count, maximum))
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    Scans the card line by line while decoded lines are announced and executed on a worker thread
+    """
+
+    def __init__(self, robot, code: HammingCode, machine: StackMachine, speaker: SpeechQueue,
+                 sweep: bool = False, bidirectional: bool = False, samples: int = 1, depth: int = 2, start_delay: float = 8,
+                 settle_delay: float = 0, rescan_delay: float = 0, timer: StageTimer = None, clock: Clock = None,
+                 checkpoint: Checkpoint = None) -> None:
+        """
+        Initializes the class Pipeline with all values necessary.
+
+        Args:
+            robot (Robot): Moves the sensor and the card and reads the color sensor
+            code (HammingCode): Decoder for the scanned lines
+            machine (StackMachine): Executes the decoded code words
+            speaker (SpeechQueue): Queue for all announcements
+            sweep (bool): Read each line in one continuous sweep instead of stepping from bit to bit
+            bidirectional (bool): Read every other line from right to left instead of resetting the sensor
+            samples (int): Maximum number of samples voted on per bit when stepping from bit to bit
+            depth (int): Number of decoded lines waiting for execution before the scanner waits
+            start_delay (float): Seconds to wait after the red marker of a card has been detected
+            settle_delay (float): Seconds to wait after the last bit of a line before resetting the sensor, the motors
+                hold their position after a move so none is needed
+            rescan_delay (float): Seconds to wait before a line that could not be decoded is read again
+            timer (StageTimer): Timer shared with other components, a new one on the same clock if omitted
+            clock (Clock): Clock to wait on, the wall clock if omitted
+            checkpoint (Checkpoint): Journal of the executed code words, nothing is persisted if omitted
+        """
+        self.robot = robot
+        self.code = code
+        self.machine = machine
+        self.speaker = speaker
+        self.sweep = sweep
+        self.bidirectional = bidirectional
+        self.samples = samples
+        self.at_right = False  # Sensor stands at the right end of the line, the next line is read backwards
+        self.start_delay = start_delay
+        self.settle_delay = settle_delay
+        self.rescan_delay = rescan_delay
+        self.lines = queue.Queue(maxsize=depth)
+        self.clock = clock if clock is not None else Clock()
+        self.timer = timer if timer is not None else StageTimer(self.clock)
+        self.checkpoint = checkpoint
+        self.line = 0  # Line of the card under the sensor
+        self.error = None  # Exception raised on the worker thread, re-raised by run()
+
+    def read_line(self) -> Tuple[List[Union[None, int]], List[float]]:
+        """
+        Reads one line of the bar code card and returns the hard values and the per-bit confidences.
+
+        In bidirectional mode a line is read from right to left if the sensor stands at the right end, and the
+        sensor is not reset afterwards.
+
+        Returns:
+            tuple: (values, confidences), one entry per bit of a codeword in codeword order
+        """
+        bits = self.code.total_bits + 1
+        direction = -1 if self.at_right else 1
+        values = []
+        confidences = []
+        with self.timer.measure("scan"):
+            if self.sweep:
+                samples = self.robot.sweep_line(bits, direction)
+                if direction < 0:
+                    samples.reverse()
+                values, confidences = recover_bits([self.robot.bit_confidence(b) for b in samples], bits)
+            else:
+                for i in range(bits):
+                    if direction > 0:
+                        self.robot.sensor_step()
+                    if self.samples > 1:
+                        value, agreement, confidence = self.robot.read_burst(self.samples)
+                        values.append(value if agreement >= MIN_AGREEMENT else None)
+                        confidences.append(confidence)
+                    else:
+                        b = self.robot.read_raw()  # One sample serves both the hard and the soft decision
+                        values.append(self.robot.classify(b))
+                        confidences.append(self.robot.bit_confidence(b))
+                    if direction < 0:
+                        self.robot.sensor_step(-1)
+                if direction < 0:
+                    values.reverse()
+                    confidences.reverse()
+            print("Read bits are", values)
+            self.clock.sleep(self.settle_delay)
+        if self.bidirectional:
+            self.at_right = direction > 0
+        else:
+            with self.timer.measure("reset"):
+                self.robot.sensor_reset()  # Resets sensor to initial position
+        return values, confidences
+
+    def decode_line(self, values: List[Union[None, int]], confidences: List[float]) -> Tuple:
+        """
+        Decodes a line with unknown bits as erasures, falling back to soft-decision decoding if that fails. A line
+        that can not be decoded either way yields no m-tuple.
+
+        Args:
+            values (list): Hard values of the line, None or 5 for unknown bits
+            confidences (list): Probability of each bit being 1
+        Returns:
+            tuple: (m-tuple, HCResult) or (None, HCResult)
+        """
+        with self.timer.measure("decode"):
+            received = tuple(t if t in (0, 1) else None for t in values)
+            out_tuple = self.code.decode_erasures(received)
+            if out_tuple[1] == HCResult.UNCORRECTABLE:
+                out_tuple = self.code.decode_soft(tuple(confidences))
+                if out_tuple[1] == HCResult.UNCORRECTABLE:
+                    out_tuple = None, HCResult.UNCORRECTABLE  # The best candidate is a guess, not to be executed
+        return out_tuple
+
+    def scan_line(self) -> Union[None, Tuple[Tuple, Tuple[str, ...]]]:
+        """
+        Reads and decodes one line, reading it a second time only if it can not be decoded.
+
+        Returns:
+            Union: ((m-tuple, HCResult), texts to announce), or None if the red marker was missing after reading
+            backwards
+        """
+        backwards = self.at_right
+        values, confidences = self.read_line()
+        if backwards and self.robot.read_value() != 5:
+            return None
+        out_tuple = self.decode_line(values, confidences)
+        if out_tuple[1] == HCResult.UNCORRECTABLE:
+            print("Re reading line because of Uncorrectable code")
+            self.clock.sleep(self.rescan_delay)
+            values, confidences = self.read_line()
+            out_tuple = self.decode_line(values, confidences)
+        return out_tuple, render_announcement(tuple(values), out_tuple[0])
+
+    def run(self, start_line: int = 0) -> int:
+        """
+        Processes lines as long as the red marker of a card is detected in front of a line.
+
+        Line N is announced and executed while the sensor resets and the card scrolls to line N + 1. In
+        bidirectional mode a card must be present before a line is read backwards, otherwise the card has ended.
+        The red marker is checked whenever a backwards read ends at the start position; if it is missing, the
+        sensor has drifted, and the sensor is reset before the marker is checked again and the line is read
+        forwards. All waits go through the clock, and the time from one line
+        to the next is measured as stage "line". If executing a line raises, scanning stops and the exception is
+        raised once the worker has ended.
+
+        Args:
+            start_line (int): Number of lines at the start of the card that were executed before a restart, they are
+                scrolled past without being read
+        Returns:
+            int: Number of lines of the card passed, 0 if no card was detected
+        """
+        worker = threading.Thread(target=self.__execute_lines, name="execute", daemon=True)
+        self.line = 0
+        self.error = None
+        worker.start()
+        try:
+            while self.error is None and (self.at_right or self.robot.read_value() == 5):
+                with self.timer.measure("line"):  # Wall time per line, would-be wall time on a virtual clock
+                    if self.line < start_line:
+                        print("Skipping line", self.line, "executed before the restart")
+                        with self.timer.measure("scroll"):
+                            self.robot.scroll_step()
+                        self.line += 1
+                        continue
+                    if self.at_right and not self.robot.card_present():
+                        # The card ended after a forward read, the slot may hold the next card already
+                        print("Card ended, resetting sensor")
+                        with self.timer.measure("reset"):
+                            self.robot.sensor_reset()
+                        self.at_right = False
+                        break
+                    if not self.at_right:
+                        print("Red detected")
+                        self.clock.sleep(self.start_delay)
+                    line = self.scan_line()
+                    if line is None:
+                        print("Red marker missing after reading backwards, resetting sensor")
+                        with self.timer.measure("reset"):
+                            self.robot.sensor_reset()
+                        continue
+                    with self.timer.measure("queue"):
+                        self.lines.put((self.line,) + line)  # Waits only if execution falls behind by more than depth lines
+                    with self.timer.measure("scroll"):
+                        self.robot.scroll_step()  # Scroller motor works to move to next line
+                    self.line += 1
+        finally:
+            self.lines.put(None)
+            worker.join()
+            print(self.timer.report())
+        if self.error is not None:
+            raise self.error
+        return self.line
+
+    def __execute_lines(self) -> None:
+        """
+        Worker thread announcing and executing the decoded lines in order.
+        """
+        while True:
+            line = self.lines.get()
+            if line is None:
+                return
+            if self.error is not None:
+                continue  # Drains the queue so that the scanner never waits for space
+            try:
+                self.__execute_line(*line)
+            except Exception as error:
+                self.error = error
+
+    def __execute_line(self, index: int, out_tuple: Tuple, announcement: Tuple[str, ...]) -> None:
+        """
+        Announces and executes one decoded line and journals the executed code word.
+        """
+        word, result = out_tuple
+        with self.timer.measure("announce"):
+            for text in announcement:
+                self.speaker.say(text)
+        print("The Opcode is", word, result)
+        if word is None:
+            return
+        with self.timer.measure("execute"):
+            state = self.machine.do(word)  # Executing stack machine
+            if self.checkpoint is not None:
+                if state == SMState.STOPPED:
+                    self.checkpoint.finish()  # The program is complete, nothing left to resume
+                else:
+                    self.checkpoint.record(index, word)
+            print("THE TOP ELEMENT OF STACK IS", self.machine.top())
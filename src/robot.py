@@ -1,7 +1,33 @@
 #!/usr/bin/env python3
 
-import ev3dev.ev3 as ev3
-import time
+import logging
+import os
+from typing import List, Tuple, Union
+from color_classifier import ColorClassifier, majority_vote
+from devices import Devices, EV3Devices
+from pipeline import StageTimer
+
+logger=logging.getLogger(__name__)
+
+# Centers of the raw RGB ranges of white and black bars
+WHITE_CENTER=(275,435,190)
+BLACK_CENTER=(140,295,90)
+EMPTY_CENTER=(30,40,20)                                  #No card in front of the sensor, hardly any light is reflected
+
+# Closed-loop moves: targets in tacho counts, speeds in tacho counts per second
+STEP_COUNTS=135                                          #Width of one bit
+STEP_SPEED=77
+RESET_SPEED=385
+SCROLL_COUNTS=70                                         #Height of one line
+SCROLL_SPEED=140
+MOVE_TIMEOUT=10                                          #Seconds until a blocked motor is given up on
+
+# Continuous sweep: one bit is STEP_COUNTS tacho counts wide, sampled at SAMPLE_RATE per second
+SWEEP_SPEED=231
+SAMPLE_RATE=50
+
+# Number of samples taken over each patch in calibration mode
+CALIBRATION_SAMPLES=20
 
 
 class Robot:
@@ -10,74 +36,149 @@ class Robot:
     This class provides logic for moving the sensor and scrolling the bar code cards
     """
 
-    def sensor_step(self):
+    def __init__(self, timer: StageTimer = None, calibration_file: str = None, devices: Devices = None):
+        """
+        Takes the motors and the color sensor from the devices once, the EV3 backend keeps them open between calls
+        :param timer: optional StageTimer that records the latency of every sensor read as stage "read"
+        :param calibration_file: optional file written by calibrate(), the hard-coded color ranges are used without it
+        :param devices: motors, color sensor and clock to use, the ones of the EV3 brick if omitted
+        """
+        if devices is None:
+            devices=EV3Devices()
+        self.sensor_motor = devices.sensor_motor
+        self.scroll_motor = devices.scroll_motor
+        self.color_sensor = devices.color_sensor
+        self.buttons = devices.buttons
+        self.clock = devices.clock
+        self.sensor_motor.reset()                        #Tacho count zero at the start of the line
+        self.timer = timer
+        self.calibration_file = calibration_file
+        self.classifier = None
+        if calibration_file is not None and os.path.exists(calibration_file):
+            try:
+                self.classifier = ColorClassifier.load(calibration_file)
+            except (OSError, ValueError, KeyError) as error:  #Unreadable file, e.g. written by an older version
+                logger.warning("Ignoring calibration file %s, using the hard-coded color ranges: %s", calibration_file, error)
+
+    def sensor_step(self, direction: int = 1):
         """
         Moves the sensor one step to read the next bar code value
+        :param direction: 1 to move right, -1 to move left when scanning a line backwards
         """
         # implementation
-        pass
-        m = ev3.LargeMotor("outA")
-        m.reset()
-        m.speed_sp = 77
-        m.command="run-forever"
-        time.sleep(1.75)
-        m.time_sp=2
-        m.stop_action="brake"
-        m.run_timed()
-        m.stop()
-        time.sleep(1)
-
-
-
-    
+        self.move(self.sensor_motor, STEP_COUNTS*direction, STEP_SPEED)
 
     def sensor_reset(self):
         """
-        Resets the sensor position
+        Resets the sensor position to the start of the line, the tacho count is zero there
         """
         # implementation
-        pass
-        m = ev3.LargeMotor("outA")
-        m.reset()
-        m.speed_sp = -385
-        m.command="run-forever"
-        time.sleep(3.86)
-        m.time_sp=2
-        m.stop_action="brake"
-        m.run_timed()
-        m.stop()
-        time.sleep(1)
-
-       
+        m = self.sensor_motor
+        self.move(m, -m.position, RESET_SPEED)
 
     def scroll_step(self):
         """
         Moves the bar code card to the next line.
         """
         # implementation
-        pass
-        m = ev3.LargeMotor('outB')
-        m.reset()
-        m.speed_sp = 140
-        m.command="run-forever"
-        time.sleep(0.5)
-        m.stop()
-        time.sleep(1)
+        self.move(self.scroll_motor, SCROLL_COUNTS, SCROLL_SPEED)
 
+    def move(self, m, counts: int, speed: int):
+        """
+        Turns a motor by a number of tacho counts and waits until it has arrived, it holds its position afterwards
+        :param m: motor to move
+        :param counts: relative target position, negative to move backwards
+        :param speed: tacho counts per second
+        """
+        if counts==0:
+            return
+        m.run_to_rel_pos(counts, speed)
+        if not m.wait_until_idle(MOVE_TIMEOUT):
+            print("Motor did not reach its target, position", m.position)
 
+    def sweep_line(self, bits: int, direction: int = 1) -> List[Tuple[int, int, int]]:
+        """
+        Drives the sensor across the whole line at a constant speed and samples the color sensor at a fixed rate.
+        The samples cover the line from half a step before the first bit to half a step after the last one.
+        Forwards the sensor ends where sensor_step() leaves it after the last bit, backwards at the start position.
+        :param direction: 1 to sweep from left to right, -1 from right to left
+        :return: list of raw (red, green, blue) samples in the order they were taken
+        """
+        step=STEP_COUNTS/SWEEP_SPEED                     #Seconds per bit at sweep speed
+        cs=self.color_sensor
+        m = self.sensor_motor
+        target=m.position+bits*STEP_COUNTS*direction
+        m.run_forever(SWEEP_SPEED)
+        self.clock.sleep(step/2)                         #Lead-in up to the outer edge of the first bit
+        m.run_forever(SWEEP_SPEED*direction)
+        samples=[]
+        start=self.clock.monotonic()
+        for i in range(int(bits*step*SAMPLE_RATE)):
+            samples.append(cs.read_rgb())
+            self.clock.sleep(start+(i+1)/SAMPLE_RATE-self.clock.monotonic())
+        self.move(m, target-m.position, SWEEP_SPEED)     #Back to the center of the last bit or the start position
+        return samples
 
-    def read_value(self) -> int:
+    def read_raw(self) -> Tuple[int, int, int]:
         """
-        Reads a single value, converts it and returns the binary expression
-        :return: int
+        Reads a single raw sample of the color sensor
+        :return: (red, green, blue) tuple
+        """
+        if self.timer is None:
+            return self.color_sensor.read_rgb()
+        with self.timer.measure("read"):
+            return self.color_sensor.read_rgb()
+
+    def card_present(self) -> bool:
+        """
+        Checks with one sample that a card is in front of the sensor where a bit or the margin is expected
+        :return: True if the sample is closer to the white or the black center than to the empty slot
+        """
+        b=self.read_raw()
+        distance=lambda center: sum((x-c)**2 for x, c in zip(b, center))
+        return min(distance(WHITE_CENTER), distance(BLACK_CENTER))<distance(EMPTY_CENTER)
+
+    def calibrate(self, samples: int = CALIBRATION_SAMPLES) -> ColorClassifier:
+        """
+        Calibration mode: samples a white, a black and a red patch placed under the sensor one after another,
+        each after a button of the brick has been pressed, fits the classifier to them and writes it to the
+        calibration file
+        :param samples: number of samples taken over each patch
+        :return: the fitted ColorClassifier, used by classify() from now on
+        """
+        readings={}
+        for value, name in ((0, "white"), (1, "black"), (5, "red")):
+            print("Place the sensor over a "+name+" patch and press a button")
+            self.buttons.wait_for_press()                #No console to read from when started from the brick menu
+            readings[value]=[self.read_raw() for i in range(samples)]
+        self.classifier=ColorClassifier.fit(readings)
+        if self.calibration_file is not None:
+            self.classifier.save(self.calibration_file)
+        return self.classifier
+
+    def classify(self, b: Tuple[int, int, int]) -> Union[None, int]:
+        """
+        Converts a raw sample into the binary expression
+        :return: 0 for white, 1 for black, 5 for red, None if the color is unknown
+        """
+        return self.classify_with_confidence(b)[0]
+
+    def classify_with_confidence(self, b: Tuple[int, int, int]) -> Tuple[Union[None, int], float]:
+        """
+        Converts a raw sample into the binary expression with the learned lookup table if calibrated,
+        with the hard-coded color ranges otherwise
+        :return: (0 for white, 1 for black, 5 for red or None, confidence between 0 and 1)
+        """
+        if self.classifier is not None:
+            return self.classifier.classify(b)
+        value=self.classify_ranges(b)
+        return value, 0.0 if value is None else 1.0
+
+    def classify_ranges(self, b: Tuple[int, int, int]) -> Union[None, int]:
+        """
+        Converts a raw sample into the binary expression with the hard-coded color ranges
+        :return: 0 for white, 1 for black, 5 for red, None if the color is unknown
         """
-        # implementation
-        cs=ev3.ColorSensor()
-        cs.mode='RGB-RAW'
-        cs.bin_data("hhh")
-        b=()
-        b=cs.bin_data("hhh")
-        print(cs.bin_data("hhh"))
         tup_white1=(290,470,220)
         tup_white2=(260,400,160)
         if b[2]<= 220 and b[2]>=160:
@@ -95,9 +196,43 @@ class Robot:
         if b[0]<= 180 and b[0]>=100:
             print("Black")
             return 1
-       
+        return None
 
-               
-        
+    def bit_confidence(self, b: Tuple[int, int, int]) -> float:
+        """
+        Estimates the probability of a raw sample being black (binary 1) for soft-decision decoding.
+        The sample is projected onto the line between the white and the black center.
+        :return: float between 0 and 1
+        """
+        if self.classifier is not None:
+            return self.classifier.black_probability(b)
+        direction=[w-k for w, k in zip(WHITE_CENTER, BLACK_CENTER)]
+        offset=[x-k for x, k in zip(b, BLACK_CENTER)]
+        t=sum(d*o for d, o in zip(direction, offset))/sum(d*d for d in direction)
+        return min(max(1-t, 0.0), 1.0)
+
+    def read_burst(self, samples: int) -> Tuple[Union[None, int], float, float]:
+        """
+        Reads up to samples values in quick succession and votes on the binary expression,
+        stops as soon as the remaining samples can not change the majority
+        :param samples: maximum number of samples
+        :return: (majority value, fraction of the samples agreeing with it, mean probability of being black)
+        """
+        raw=[]
+        def read():
+            b=self.read_raw()
+            raw.append(b)
+            return self.classify(b)
+        value, agreement=majority_vote(read, samples)
+        return value, agreement, sum(self.bit_confidence(b) for b in raw)/len(raw)
 
-       
+    def read_value(self, samples: int = 1) -> int:
+        """
+        Reads a single value, converts it and returns the binary expression
+        :param samples: number of samples to vote on, see read_burst()
+        :return: int
+        """
+        # implementation
+        if samples>1:
+            return self.read_burst(samples)[0]
+        return self.classify(self.read_raw())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import math
+import random
+from typing import List, Sequence, Tuple
+
+from clock import VirtualClock
+from devices import Buttons, ColorSensor, Devices, Motor, Sound
+from robot import BLACK_CENTER, EMPTY_CENTER, SCROLL_COUNTS, STEP_COUNTS, WHITE_CENTER
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Raw RGB value of the red marker in front of every line
+RED_CENTER = (250, 255, 105)
+
+# Seconds a motor needs to brake and settle on its target after a move
+MOVE_SETTLE_TIME = 0.1
+
+# Seconds per raw sample of the color sensor
+READ_TIME = 0.005
+
+
+class SimulatedMotor(Motor):
+    """
+    Motor moving at constant speed in the virtual time of the simulated devices
+    """
+
+    def __init__(self, devices: 'SimulatedDevices', position_noise: float = 0.0) -> None:
+        """
+        Initializes the class SimulatedMotor with all values necessary.
+
+        Args:
+            devices (SimulatedDevices): Devices providing the virtual clock and the random numbers
+            position_noise (float): Standard deviation of the final position of a move in tacho counts
+        """
+        self.devices = devices
+        self.position_noise = position_noise
+        self.start = 0.0  # Position at start_time
+        self.start_time = 0.0
+        self.speed = 0.0
+        self.target = None  # Final position of a move, None when running forever or stopped
+        self.end_time = 0.0
+
+    def __current(self) -> float:
+        """
+        Returns:
+            float: Exact position at the current virtual time
+        """
+        travelled = self.speed * (self.devices.clock.monotonic() - self.start_time)
+        if self.target is not None:
+            distance = self.target - self.start
+            return self.start + math.copysign(min(abs(travelled), abs(distance)), distance)
+        return self.start + travelled
+
+    def __freeze(self, speed: float = 0.0, target: float = None, end_time: float = 0.0) -> None:
+        """
+        Starts a new segment of motion at the current position.
+        """
+        self.start = self.__current()
+        self.start_time = self.devices.clock.monotonic()
+        self.speed = speed
+        self.target = target
+        self.end_time = end_time
+
+    @property
+    def position(self) -> int:
+        return int(round(self.__current()))
+
+    def reset(self) -> None:
+        self.__freeze()
+        self.start = 0.0
+
+    def run_forever(self, speed: int) -> None:
+        self.__freeze(speed)
+
+    def run_to_rel_pos(self, counts: int, speed: int) -> None:
+        start = self.__current()
+        target = start + counts + self.devices.random.gauss(0, self.position_noise)
+        speed = abs(speed)
+        self.__freeze(speed, target, self.devices.clock.monotonic() + abs(target - start) / speed + MOVE_SETTLE_TIME)
+
+    def wait_until_idle(self, timeout: float) -> bool:
+        if self.target is None:
+            if self.speed:
+                self.devices.clock.sleep(timeout)
+                return False
+            return True
+        remaining = self.end_time - self.devices.clock.monotonic()
+        if remaining > timeout:
+            self.devices.clock.sleep(timeout)
+            return False
+        self.devices.clock.sleep(max(remaining, 0.0))
+        return True
+
+    def stop(self) -> None:
+        self.__freeze()
+
+
+class SimulatedColorSensor(ColorSensor):
+    """
+    Color sensor looking at the card image under the simulated motors
+    """
+
+    def __init__(self, devices: 'SimulatedDevices', noise: float = 0.0) -> None:
+        """
+        Initializes the class SimulatedColorSensor with all values necessary.
+
+        Args:
+            devices (SimulatedDevices): Devices holding the cards and the motors
+            noise (float): Standard deviation of every raw color channel
+        """
+        self.devices = devices
+        self.noise = noise
+
+    def read_rgb(self) -> Tuple[int, int, int]:
+        self.devices.clock.sleep(READ_TIME)
+        color = self.devices.color_at(self.devices.sensor_motor.position, self.devices.scroll_motor.position)
+        gauss = self.devices.random.gauss
+        return tuple(min(max(int(round(c + gauss(0, self.noise))), 0), 1023) for c in color)
+
+
+class SimulatedSound(Sound):
+    """
+    Records the spoken texts instead of speaking them
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the class SimulatedSound with all values necessary.
+        """
+        self.spoken = []
+
+    def speak(self, text: str) -> None:
+        self.spoken.append(text)
+
+
+class SimulatedButtons(Buttons):
+    """
+    Buttons pressed right away, e.g. after a calibration patch has been placed under the sensor
+    """
+
+    def __init__(self, devices: 'SimulatedDevices') -> None:
+        """
+        Initializes the class SimulatedButtons with all values necessary.
+
+        Args:
+            devices (SimulatedDevices): Devices whose clock the press takes time on
+        """
+        self.devices = devices
+        self.presses = 0
+
+    def wait_for_press(self) -> None:
+        self.devices.clock.sleep(1)
+        self.presses += 1
+
+
+class SimulatedDevices(Devices):
+    """
+    Simulated robot scanning a deck of bar code cards in virtual time.
+
+    A card is a list of lines, each line a sequence of bits (1 for black). The sensor motor is at the red marker of
+    a line at position 0 and at bit i at position (i + 1) * STEP_COUNTS; the card moves one line per SCROLL_COUNTS
+    of the scroll motor. The first card is put in right away. Once the last line of a card has been scrolled out,
+    the slot is seen empty on the next read and the next card of the deck is put in.
+    """
+
+    def __init__(self, cards: Sequence[Sequence[Sequence[int]]], noise: float = 5.0, position_noise: float = 0.0,
+                 seed: int = None, clock: VirtualClock = None) -> None:
+        """
+        Initializes the class SimulatedDevices with all values necessary.
+
+        Args:
+            cards (list): Deck of cards in the order they are put in
+            noise (float): Standard deviation of every raw color channel
+            position_noise (float): Standard deviation of the final position of a move in tacho counts
+            seed (int): Seed of the random numbers, for repeatable runs
+            clock (VirtualClock): Clock that motor moves and sensor reads advance, a new one if omitted
+        """
+        self.random = random.Random(seed)
+        self.clock = clock if clock is not None else VirtualClock()
+        self.deck = list(cards)
+        self.card = None  # type: List
+        self.card_start = 0  # Position of the scroll motor at the first line of the card
+        self.cards = 0  # Number of cards put in
+        self.sensor_motor = SimulatedMotor(self, position_noise)
+        self.scroll_motor = SimulatedMotor(self, position_noise)
+        self.color_sensor = SimulatedColorSensor(self, noise)
+        self.sound = SimulatedSound()
+        self.buttons = SimulatedButtons(self)
+        self.__put_in(0)
+
+    def __put_in(self, y: int) -> None:
+        """
+        Puts the next card of the deck in, if any.
+
+        Args:
+            y (int): Position of the scroll motor
+        """
+        if self.deck:
+            self.card = self.deck.pop(0)
+            self.card_start = y
+            self.cards += 1
+
+    def color_at(self, x: int, y: int) -> Tuple[int, int, int]:
+        """
+        Returns the noiseless color under the sensor.
+
+        Args:
+            x (int): Position of the sensor motor
+            y (int): Position of the scroll motor
+        Returns:
+            tuple: Raw (red, green, blue) value
+        """
+        line = int(math.floor((y - self.card_start) / SCROLL_COUNTS + 0.5))
+        if self.card is not None and line >= len(self.card):
+            self.card = None  # Scrolled out
+        if self.card is None:
+            self.__put_in(y)
+            return EMPTY_CENTER
+        cell = int(math.floor(x / STEP_COUNTS + 0.5))
+        if cell == 0:
+            return RED_CENTER
+        if 0 < cell <= len(self.card[line]):
+            return BLACK_CENTER if self.card[line][cell - 1] else WHITE_CENTER
+        return WHITE_CENTER
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import threading
+from collections import deque
+from typing import Callable
+
+from devices import Sound
+from lru_cache import LRUCache
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Rendered announcements kept, the audio of a short phrase takes some ten kilobytes
+SPEECH_CACHE_CAPACITY = 64
+
+
+class RenderedSpeech:
+    """
+    Speaks texts through a Sound, the audio of texts spoken before is played from a cache instead of being
+    synthesized again
+    """
+
+    def __init__(self, sound: Sound, capacity: int = SPEECH_CACHE_CAPACITY) -> None:
+        """
+        Initializes the class RenderedSpeech with all values necessary.
+
+        Args:
+            sound (Sound): Renders and plays the audio
+            capacity (int): Number of rendered texts kept, the least recently spoken one is discarded beyond that
+        """
+        self.sound = sound
+        self.cache = LRUCache(capacity, release=sound.discard, name="speech cache")
+
+    def __call__(self, text: str) -> None:
+        """
+        Speaks a single text and waits until it has been played, e.g. as speak function of a SpeechQueue.
+
+        Args:
+            text (str): Text to speak
+        """
+        audio = self.cache.get(text)
+        if audio is None:
+            audio = self.sound.render(text)
+            self.cache.put(text, audio)
+        self.sound.play(audio)
+
+class SpeechQueue:
+    """
+    Speaks announcements on a background thread so that scanning and execution do not wait for text-to-speech
+    """
+
+    def __init__(self, maxsize: int = 4, speak: Callable[[str], None] = print) -> None:
+        """
+        Initializes the class SpeechQueue with all values necessary.
+
+        Args:
+            maxsize (int): Number of pending announcements before stale ones are dropped
+            speak (callable): Blocking function that speaks a single text, e.g. Sound.speak of the devices; the
+                announcements are printed if omitted
+        """
+        self.maxsize = maxsize
+        self.speak = speak
+        self.pending = deque()  # (text, droppable)
+        self.busy = False
+        self.dropped = 0
+        self.condition = threading.Condition()
+        self.worker = None
+        self.closed = False
+
+    def say(self, text, droppable: bool = True) -> None:
+        """
+        Queues an announcement without waiting for it to be spoken.
+
+        A text equal to the newest pending one is coalesced into it. If the queue is full, the oldest droppable
+        announcement is discarded; if none of the pending ones may be dropped, the caller waits for space.
+
+        Args:
+            text: Text to speak, converted with str()
+            droppable (bool): Whether the announcement may be discarded under backpressure
+        """
+        text = str(text)
+        with self.condition:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.__run, name="speech", daemon=True)
+                self.worker.start()
+            if self.pending and self.pending[-1][0] == text:
+                return
+            while len(self.pending) >= self.maxsize:
+                for item in self.pending:
+                    if item[1]:
+                        self.pending.remove(item)
+                        self.dropped += 1
+                        break
+                else:
+                    self.condition.wait()
+                    continue
+            self.pending.append((text, droppable))
+            self.condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Waits until every pending announcement has been spoken.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait, forever if None
+        Returns:
+            bool: True if the queue is empty, False if the timeout expired
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def close(self) -> None:
+        """
+        Speaks the remaining announcements and stops the background thread.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+
+    def __run(self) -> None:
+        """
+        Background thread speaking one announcement after another.
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed)
+                if not self.pending:
+                    return
+                text, droppable = self.pending.popleft()
+                self.busy = True
+                self.condition.notify_all()
+            try:
+                self.speak(text)
+            except Exception as error:  # A failing announcement must not stop the worker
+                print("Speech failed:", error)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
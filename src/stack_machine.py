@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 
+import logging
+import time
 from enum import IntEnum
-from typing import List, Tuple, Union
+from functools import partial
+from typing import Dict, Iterator, List, Tuple, Union
 from ctypes import c_ubyte
-from robot import *
-import ev3dev.ev3 as ev3
+from speech import SpeechQueue
+from tracer import Tracer
+
+logger = logging.getLogger(__name__)
 
 
 # IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
@@ -18,17 +23,230 @@ class SMState(IntEnum):
     ERROR = -1
 
 
+# Code words with special handling in StackMachine.validate()
+STP = 0b010000
+SPEAK = 0b100001
+
+# Maximum number of operands on the stack
+STACK_CAPACITY = 256
+
+# Type tags of the operands in OperandStack
+INT = 0
+CHAR = 1
+
+# Result of NOT for every operand: the ones' complement of the four low bits, the digits 0 - 15 as on the cards
+# are complemented completely and the high bits of larger results are kept, so NOT NOT x is x
+COMPLEMENTS = bytes(value ^ 0x0F for value in range(256))
+
+# Bits of every operand as returned by StackMachine.top(), most significant first
+BIT_TUPLES = tuple(tuple((value >> (7 - i)) & 1 for i in range(8)) for value in range(256))
+
+
+def _factorials() -> Tuple[bytes, bytes]:
+    """
+    Returns:
+        tuple: (n! modulo 256, 1 if n! does not fit into 8 bits else 0) for n = 0 - 255
+    """
+    wrapped = bytearray(256)
+    overflows = bytearray(256)
+    z = 1
+    overflow = 0
+    for n in range(256):
+        if n:
+            z *= n
+            if z > 255:
+                z &= 0xFF  # Only the low byte is kept, n! for n >= 10 is a multiple of 256
+                overflow = 1
+        wrapped[n] = z
+        overflows[n] = overflow
+    return bytes(wrapped), bytes(overflows)
+
+
+# Factorial of every operand modulo 256, and whether it saturated the 8-bit range
+FACTORIALS, FACTORIAL_OVERFLOWS = _factorials()
+
+# Value of every hexadecimal digit card: the operands 0 - 9 and the characters A - F
+HEX_DIGITS = dict([(value, value) for value in range(10)] + [(c, 10 + i) for i, c in enumerate("ABCDEF")])
+
+
+class OperandStack:
+    """
+    Fixed-capacity stack of 8-bit operands and characters.
+
+    Every slot is a type tag followed by an unsigned byte, interleaved in one preallocated bytearray, so the
+    memory use does not depend on the program and a snapshot is a single slice copy.
+    """
+
+    def __init__(self, capacity: int = STACK_CAPACITY) -> None:
+        """
+        Initializes the class OperandStack with all values necessary.
+
+        Args:
+            capacity (int): Maximum number of operands
+        """
+        self.capacity = capacity
+        self.buffer = bytearray(2 * capacity)  # tag, value of slot 0, tag, value of slot 1, ...
+        self.depth = 0
+        self.overflow = False  # Set when a push found the stack full
+
+    def push(self, value: Union[int, str]) -> bool:
+        """
+        Pushes an operand (0 - 255) or a single character.
+
+        Args:
+            value (Union): Operand or character
+        Returns:
+            bool: False if the stack is full, the value is dropped and the overflow flag is set
+        """
+        if self.depth == self.capacity:
+            self.overflow = True
+            return False
+        index = 2 * self.depth
+        if isinstance(value, str):
+            self.buffer[index + 1] = ord(value)
+            self.buffer[index] = CHAR
+        else:
+            self.buffer[index + 1] = value
+            self.buffer[index] = INT
+        self.depth += 1
+        return True
+
+    def pop(self) -> Union[int, str]:
+        """
+        Removes the top element.
+
+        Returns:
+            Union: int for operands, str for characters
+        """
+        if not self.depth:
+            raise IndexError("pop from empty stack")
+        self.depth -= 1
+        index = 2 * self.depth
+        value = self.buffer[index + 1]
+        return chr(value) if self.buffer[index] == CHAR else value
+
+    def peek(self, offset: int = 1) -> Union[int, str]:
+        """
+        Returns an element without removing it.
+
+        Args:
+            offset (int): 1 for the top element, 2 for the one below and so on
+        Returns:
+            Union: int for operands, str for characters
+        """
+        if not 0 < offset <= self.depth:
+            raise IndexError("stack index out of range")
+        index = 2 * (self.depth - offset)
+        value = self.buffer[index + 1]
+        return chr(value) if self.buffer[index] == CHAR else value
+
+    def operands(self, count: int) -> bool:
+        """
+        Checks the type tags of the top elements without removing them.
+
+        Args:
+            count (int): Number of elements from the top, at most the depth
+        Returns:
+            bool: True if none of them is a character
+        """
+        index = 2 * self.depth
+        return CHAR not in self.buffer[index - 2 * count:index:2]
+
+    def swap(self) -> None:
+        """
+        Swaps the two top elements.
+        """
+        if self.depth < 2:
+            raise IndexError("swap needs two elements")
+        index = 2 * self.depth
+        buffer = self.buffer
+        buffer[index - 4:index - 2], buffer[index - 2:index] = buffer[index - 2:index], buffer[index - 4:index - 2]
+
+    def clear(self) -> None:
+        """
+        Removes all elements and resets the overflow flag.
+        """
+        self.depth = 0
+        self.overflow = False
+
+    def snapshot(self) -> bytes:
+        """
+        Copies the stack into a compact buffer.
+
+        Returns:
+            bytes: Tag and value of every element, bottom first
+        """
+        return bytes(self.buffer[:2 * self.depth])
+
+    def restore(self, snapshot: bytes) -> None:
+        """
+        Replaces the contents of the stack with a snapshot.
+
+        Args:
+            snapshot (bytes): Buffer returned by snapshot()
+        """
+        if len(snapshot) % 2 or len(snapshot) > len(self.buffer):
+            raise ValueError("Invalid stack snapshot")
+        self.buffer[:len(snapshot)] = snapshot
+        self.depth = len(snapshot) // 2
+        self.overflow = False
+
+    def values(self) -> List[Union[int, str]]:
+        """
+        Returns:
+            list: All elements as int or str, bottom first
+        """
+        return [self.peek(offset) for offset in range(self.depth, 0, -1)]
+
+    def __len__(self) -> int:
+        return self.depth
+
+    def __getitem__(self, index: int) -> Union[c_ubyte, str]:
+        """
+        Returns an element by position like a list, operands as c_ubyte and characters as str.
+        """
+        if index < 0:
+            index += self.depth
+        if not 0 <= index < self.depth:
+            raise IndexError("stack index out of range")
+        value = self.buffer[2 * index + 1]
+        return chr(value) if self.buffer[2 * index] == CHAR else c_ubyte(value)
+
+    def __iter__(self) -> Iterator[Union[int, str]]:
+        return iter(self.values())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, OperandStack):
+            return self.snapshot() == other.snapshot()
+        if isinstance(other, (list, tuple)):
+            return self.values() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(self.values())
+
+
 class StackMachine:
     """
     Implements the 8-bit stack machine according to the specification
     """
 
-    def __init__(self) -> None:
+    def __init__(self, speaker: SpeechQueue = None, tracer: Tracer = None) -> None:
         """
         Initializes the class StackMachine with all values necessary.
+
+        Args:
+            speaker (SpeechQueue): Queue for all announcements, a new one if omitted
+            tracer (Tracer): Receives a record of every executed code word, nothing is measured if omitted
         """
-        self.overflow = False
-        self.stack = []
+        self.speaker = speaker if speaker is not None else SpeechQueue()
+        self.tracer = tracer
+        if tracer is not None:
+            self.execute = self.__execute_traced
+        self.overflow = False  # Set when the last arithmetic result did not fit into 8 bits
+        self.stack = OperandStack()
         self.SMState=1
         # Hashtable for instructions/character values
         self.Instruction = {"010000": "STP",  # Signals end of execution
@@ -44,6 +262,7 @@ class StackMachine:
                             "011010": "SHL",  # Shifts Top-1 by Top places to the left
                             "011011": "SHR",  # Shifts Top-1 by Top places to the right
                             "011100": "HEX",  # Hexadecimal to decimal
+                            "011101": "FAC",  # Calculates the factorial of Top
                             "011110": "NOT",  # Forms the ones' complement of Top
                             "011111": "XOR",  # Performs the logical XOR operation on Top and Top-1 bit by bit
                             "100001": "SPEAK",# Execute Text-to-Speech
@@ -80,6 +299,41 @@ class StackMachine:
                           "111100": "Y",  # Push "Y" to stack
                           "111101": "Z", }  # Push "Z" to stack
 
+        # Handler, number of operands taken from the stack, how many of them must not be characters and number
+        # of results pushed on the stack for every instruction. Both counts are checked before the handler runs,
+        # so an instruction that fails leaves the stack unchanged.
+        handlers = {"STP": (self.__stp, 0, 0, 0),
+                    "DUP": (self.__dup, 1, 0, 2),
+                    "DEL": (self.__del, 1, 0, 0),
+                    "SWP": (self.__swp, 2, 0, 2),
+                    "ADD": (self.__add, 2, 2, 1),
+                    "SUB": (self.__sub, 2, 2, 1),
+                    "MUL": (self.__mul, 2, 2, 1),
+                    "DIV": (self.__div, 2, 2, 1),
+                    "EXP": (self.__exp, 2, 2, 1),
+                    "MOD": (self.__mod, 2, 2, 1),
+                    "SHL": (self.__shl, 2, 2, 1),
+                    "SHR": (self.__shr, 2, 2, 1),
+                    "HEX": (self.__hex, 2, 0, 1),  # Digits 0 - 9 and A - F, checked at execution
+                    "FAC": (self.__fac, 1, 1, 1),
+                    "NOT": (self.__not, 1, 1, 1),
+                    "XOR": (self.__xor, 2, 2, 1),
+                    "SPEAK": (self.__speak, 1, 1, 0),  # Takes another Top operands, checked at execution
+                    "NOP": (self.__nop, 0, 0, 0)}
+
+        # Dispatch table indexed by the 6-bit code word: operands 0 - 15, instructions and characters,
+        # and the stack effect (operands, results) of every code word for run_program()
+        self.dispatch = [None] * 64
+        self.effects = [(0, 1)] * 64
+        for value in range(16):
+            self.dispatch[value] = (partial(self.__push, value), 0, 0)
+        for code, name in self.Instruction.items():
+            handler, operands, numbers, results = handlers[name]
+            self.dispatch[int(code, 2)] = (handler, operands, numbers)
+            self.effects[int(code, 2)] = (operands, results)
+        for code, character in self.Character.items():
+            self.dispatch[int(code, 2)] = (partial(self.__push, character), 0, 0)
+
     def do(self, code_word: Tuple[int, ...]) -> SMState:
         """
         Processes the entered code word by either executing the instruction or pushing the operand on the stack.
@@ -89,480 +343,294 @@ class StackMachine:
         Returns:
             SMState: Current state of the stack machine
         """
-        # REPLACE "pass" WITH YOUR IMPLEMENTATION
-
-        length = len(self.stack)
-        print("Length of stack", length)
-        string = ""
-        overflow = False
-        def execute(str1):
-                if (str1 == "010011"):  # Swap Instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Swap").wait()
-                    print("SWAP")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    self.stack.append(x)
-                    self.stack.append(y)
-                    print(x)
-                    print(y)
-                    return 1
-                elif (str1 == "010001"):  # Duplicate Instruction
-                    x = self.stack.pop()
-                    self.stack.append(x)
-                    self.stack.append(x)
-                    ev3.Sound.speak("Instruction Duplicate").wait()
-                    print("DUPLICATE")
-                    return 1
-
-                elif (str1 == "010000"):  # Stop Instruction
-                    ev3.Sound.speak("Instruction Stop").wait()
-                    print("STOP")
-                    print("End of Execution")
-                    print("Final Stack is", self.stack)
-                    print("SMSSTAte")
-                    return 0
-                    quit()
-
-                elif (str1 == "010010"):  # Delete Instruction
-                    ev3.Sound.speak("Instruction Delete").wait()
-                    print("DELETE")
-                    self.stack.pop()
-                    return 1
-                elif (str1 == "010100"):  # Add Instruction
-                    ev3.Sound.speak("Instruction Add").wait()
-                    print("ADD")
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = x + y
-                    if (z > 255):
-                        overflow = True
-                        print("There is overflow")
-                        print("overflow = ", overflow)
-                    else:
-                        overflow = False
-                        self.stack.append(z)
-                    return 1
-                elif (str1 == "010101"):  # Subtract instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Subtract").wait()
-                    print("SUBTRACT")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = y - x
-                    if (z < 0):
-                        overflow = True
-                        print("There is overflow")
-                        print("overflow = ", overflow)
-                    else:
-                        overflow = False
-                        self.stack.append(z)
-                    return 1
-                elif (str1 == "010110"):  # Multiplication instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Multiply").wait()
-                    print("MULTIPLICATION")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = x * y
-                    if (z > 255):
-                        overflow = True
-                        print("There is overflow")
-                        print("overflow = ", overflow)
-                    else:
-                        overflow = False
-                        self.stack.append(z)
-                    return 1
-                elif (str1 == "010111"):  # Division instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        print("SMState ERROR")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Division").wait()
-                    print("DIVISION")
-                    x = self.stack.pop()
-                    if (x == 0):
-                        print("ERROR Division by 0 not possible")
-                        print("SMState ERROR")
-                        return -1
-                        quit()
-                    y = self.stack.pop()
-                    z = y // x
-                    self.stack.append(z)
-                    return 1
-                elif (str1 == "011000"):  # Exponent instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Exponent").wait()
-                    print("EXPONENT")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = y ** x
-                    if (z > 255):
-                        overflow = True
-                        print("There is overflow")
-                        print("overflow = ", overflow)
-                    else:
-                        overflow = False
-                        self.stack.append(z)
-                    return 1
-                elif (str1 == "011001"):  # Modulo instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Modulus").wait()
-                    print("MODULUS")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = y % x
-                    self.stack.append(z)
-                    return 1
-                elif (str1 == "011010"):  # Shift to Left Instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Shift to left").wait()
-                    print("SHIFT TO LEFT")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = y << x
-                    if (z > 255):
-                        overflow = True
-                        print("There is overflow")
-                        print("overflow = ", overflow)
-                    else:
-                        overflow = False
-                        self.stack.append(z)
-                    print(z)
-                    return 1
-                elif (str1 == "011011"):  # Shift to Right Instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Shift to right").wait()
-                    print("SHIFT TO RIGHT")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = y >> x
-                    print(z)
-                    self.stack.append(z)
-                    return 1
-                elif (str1 == "011100"):  # Hexadecimal Instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction Hexadecimal").wait()
-                    print("HEXADECIMAL")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    z = 0
-                    tot = 0
-                    is_Int = True
-                    try:
-                        int(x)
-                    except:
-                        is_Int = False
-                    if is_Int:
-                        tot = 16 * x
-                    else:
-                        if (x == 'A'):
-                            z = 10
-                        elif (x == 'B'):
-                            z = 11
-                        elif (x == 'C'):
-                            z = 12
-                        elif (x == 'D'):
-                            z = 13
-                        elif (x == 'E'):
-                            z = 14
-                        elif (x == 'F'):
-                            z = 15
-                        tot = tot + 16 * z
-                    is_Int_1 = True
-                    try:
-                        int(y)
-                    except:
-                        is_Int_1 = False
-                    if is_Int_1:
-                        tot = tot + y
-                    else:
-                        if (y == 'A'):
-                            z = 10
-                        elif (y == 'B'):
-                            z = 11
-                        elif (y == 'C'):
-                            z = 12
-                        elif (y == 'D'):
-                            z = 13
-                        elif (y == 'E'):
-                            z = 14
-                        elif (y == 'F'):
-                            z = 15
-                        tot = tot + z
-                    print(tot)
-                    self.stack.append(tot)
-                    return 1
-
-
-                elif (str1 == "011101"):  # Factorial instruction
-                    ev3.Sound.speak("Instruction Factorial").wait()
-                    print("FACTORIAL")
-                    x = self.stack.pop()
-                    z = 1
-                    j = 1
-                    for i in range(x):
-                        z = z * j
-                        j += 1
-                    print(z)
-                    if (z > 255):
-                        overflow = True
-                        print("There is overflow")
-                        print("overflow = ", overflow)
-                    else:
-                        overflow = False
-                        self.stack.append(z)
-                    return 1
-                elif (str1 == "011110"):  # 1s Complement instruction
-                    ev3.Sound.speak("Instruction ones complement").wait()
-                    print("NOT 1S COMPLEMENT")
-                    x = self.stack.pop()
-                    st2 = "0b"
-                    binary = bin(x)
-                    positive_binary = format(x, 'b')
-                    tp = tuple(positive_binary)
-                    i = 1
-                    b = []
-                    n = x
-                    while (n > 0):
-                        d = n % 2
-                        b.append(d)
-                        n = n // 2
-                        i += 1
-                    while (i != 5):
-                        b.append(0)
-                        i += 1
-                    b.reverse()
-                    print("Binary Tuple is: ", b)  # returning integer as binary tuple
-
-                    k = 4
-                    while (k != 8):
-                        st2 += "".join(str(0))
-                        print(st2)
-                        k += 1
-
-
-                    for i in range(4):
-                        st2 += "".join(str(int(b[i]) ^ 1))
-                        print(st2)
-
-
-                    self.stack.append(int(st2,2))
-                    return 1
-                elif (str1 == "011111"):  # XOR instruction
-                    if (length < 2):
-                        print("Not enough operands")
-                        return -1
-                        quit()
-                    ev3.Sound.speak("Instruction XOR").wait()
-                    print("XOR")
-                    x = self.stack.pop()
-                    y = self.stack.pop()
-                    st1 = bin(x)
-                    st2 = bin(y)
-                    k = int(st1, 2) ^ int(st2, 2)
-                    print("Bitwise Xor is")
-                    print('{0:b}'.format(k))
-                    self.stack.append(k)
-                    return 1
-
-        for i in range(len(code_word)):
-                string += "".join(str(code_word[i]))
-        print(string)
-        if (code_word[0] == 0):
-                if (code_word[1] == 0):
-                    print("Operand")
-                    k = int(string, 2)
-                    print(k)
-                    self.stack.append(k)
-                    print("The stack is")
-                    print(self.stack)
-                    return 1
-
-                elif (code_word[1] == 1):
-                    print("Instruction")
-                    k=execute(string)
-                    print("The stack is")
-                    print(self.stack)
-                    print("SMState value is",k)
-                    return(k)
-        elif (code_word[0] == 1):
-                print("Character")
-                if (string == "100100"):
-                    self.stack.append("A")  # Push "A" to stack
-                elif (string == "100101"):
-                    self.stack.append("B")  # Push "B" to stack
-                elif (string == "100110"):
-                    self.stack.append("C")  # Push "C" to stack
-                elif (string == "100111"):
-                    self.stack.append("D")  # Push "D" to stack
-                elif (string == "101000"):
-                    self.stack.append("E")  # Push "E" to stack
-                elif (string == "101001"):
-                    self.stack.append("F")  # Push "F" to stack
-                elif (string == "101010"):
-                    self.stack.append("G")  # Push "G" to stack
-                elif (string == "101011"):
-                    self.stack.append("H")  # Push "H" to stack
-                elif (string == "101100"):
-                    self.stack.append("I")  # Push "I" to stack
-                elif (string == "101101"):
-                    self.stack.append("J")  # Push "J" to stack
-                elif (string == "101110"):
-                    self.stack.append("K")  # Push "K" to stack
-                elif (string == "101111"):
-                    self.stack.append("L")  # Push "L" to stack
-                elif (string == "110000"):
-                    self.stack.append("M")  # Push "M" to stack
-                elif (string == "110001"):
-                    self.stack.append("N")  # Push "N" to stack
-                elif (string == "110010"):
-                    self.stack.append("O")  # Push "O" to stack
-                elif (string == "110011"):
-                    self.stack.append("P")  # Push "P" to stack
-                elif (string == "110100"):
-                    self.stack.append("Q")  # Push "Q" to stack
-                elif (string == "110101"):
-                    self.stack.append("R")  # Push "R" to stack
-                elif (string == "110110"):
-                    self.stack.append("S")  # Push "S" to stack
-                elif (string == "110111"):
-                    self.stack.append("T")  # Push "T" to stack
-                elif (string == "111000"):
-                    self.stack.append("U")  # Push "U" to stack
-                elif (string == "111001"):
-                    self.stack.append("V")  # Push "V" to stack
-                elif (string == "111010"):
-                        self.stack.append("W")  # Push "W" to stack
-                elif (string == "111011"):
-                    self.stack.append("X")  # Push "X" to stack
-                elif (string == "111100"):
-                    self.stack.append("Y")  # Push "Y" to stack
-                elif (string == "111101"):  # Push "Z" to stack
-                    self.stack.append("Z")
-                elif (string == "100010"):  # Push " " to stack(SPACE)
-                    self.stack.append("  ")
-                elif (string == "100000"):  # NOP
-                    print("NOP")
-                    return 1
-                elif (string == "111110"):  # NOP
-                    print("NOP")
-                    return 1
-                elif (string == "111111"):  # NOP
-                    print("NOP")
-                    return 1
-                elif (string == "100011"):  # NOP
-                    print("NOP")
-                    return 1
-                elif (string == "100001"):  # SPEAK Command
-                    print("SPEAK Command")
-                    k = self.stack.pop()
-                    speakstack = []
-                    print('The number of elements removed from stack is',k,)
-                    for i in range(k):
-                        speakstack.append(self.stack.pop())
-                    print("SPEAK OUTPUT", speakstack)
-                    ev3.Sound.speak(speakstack).wait()
-                    print(self.stack)
-                    return 1
-
-                print("The stack is")
-                print(self.stack)
-                return 1
-
-        print("The stack is")
-        print(self.stack)
-
+        opcode = 0
+        for bit in code_word:
+            opcode = (opcode << 1) | bit
+        return self.execute(opcode)
 
-    def top(self) -> Union[None, str, Tuple[int, int, int, int, int, int, int, int]]:
+    def validate(self, opcodes: List[int]) -> Union[None, int]:
         """
-        Returns the top element of the stack.
-
-        Returns:
-            union: Can be tuple, str or None
-        """
-
-        # REPLACE "pass" WITH YOUR IMPLEMENTATION
-        if (self.stack == []):  # checking for empty stack
-            print("NONE")
-            print("EMPTY STACK")
-            union = None
-            return union
-        top = self.stack.pop()  # popping out last element of stack
-        print(top)
-        is_Int = True  # checking the data type of top element
-        try:
-            int(top)
-        except:
-            is_Int = False
-        if is_Int:
-            if (top < 0):  # Checking for integer range error
-                print("RANGE ERROR:The Integer Value is out of 8 bit range")
-            elif (top > 256):
-                print("RANGE ERROR:The Integer Value is out of 8 bit range")
-            else:
-                ev3.Sound.speak("Top element is").wait()
-                ev3.Sound.speak(top).wait()
-                print("the top element is", top)
-                binary = bin(top)
-                positive_binary = format(top, 'b')
-                tp = tuple(positive_binary)
-                i = 1
-                b = []
-                n = top
-                while (n > 0):
-                    d = n % 2
-                    b.append(d)
-                    n = n // 2
-                    i += 1
-                while (i != 9):
-                    b.append(0)
-                    i += 1
-                b.reverse()
-                print("Binary Tuple is: ", b)  # returning integer as binary tuple
-                self.stack.append(top)
-                union =tuple(b)
-                return union
-        else:
-            print("Entered thing is not an Integer")
-            print("the top element is", top)  # printing character top element
-            self.stack.append(top)
-            union = top
-            return union  # pushing top element back to stack
-        print("The stack is")
-        print(self.stack)  # printing stack
+        Checks a program for stack underflow before anything is executed, starting from the current stack depth.
 
+        Arithmetic results are assumed to be pushed. The operand count of SPEAK is known only if it was pushed by
+        the code word right before, otherwise the program is not checked any further.
 
+        Args:
+            opcodes (list): 6-bit code words given as integers
+        Returns:
+            Union: Index of the first code word that would underflow the stack, None if there is none
+        """
+        depth = len(self.stack)
+        literal = None  # Value of Top if it was pushed by the previous code word
+        for position, opcode in enumerate(opcodes):
+            operands, results = self.effects[opcode]
+            if opcode == SPEAK:
+                if literal is None:
+                    return None
+                operands += literal
+            if depth < operands:
+                return position
+            if opcode == STP:
+                return None
+            depth += results - operands
+            literal = opcode if opcode < 16 else None
+        return None
+
+    def run_program(self, words: List[Union[int, Tuple[int, ...]]]) -> SMState:
+        """
+        Validates, pre-decodes and executes a whole card of code words until STP, an error or the end of the card.
 
+        Args:
+            words (list): Code words as 6-tuples or integers
+        Returns:
+            SMState: State of the stack machine after the last executed code word, ERROR without executing
+            anything if the program fails validation
+        """
+        opcodes = []
+        for word in words:
+            if not isinstance(word, int):
+                opcode = 0
+                for bit in word:
+                    opcode = (opcode << 1) | bit
+                word = opcode
+            opcodes.append(word)
+
+        position = self.validate(opcodes)
+        if position is not None:
+            logger.warning("Stack underflow at code word %d", position)
+            return SMState.ERROR
+
+        state = SMState.RUNNING
+        if self.tracer is not None:
+            for opcode in opcodes:
+                state = self.execute(opcode)
+                if state != SMState.RUNNING:
+                    break
+            return state
+
+        program = [self.dispatch[opcode] for opcode in opcodes]
+        for handler, operands, numbers in program:
+            if not self.__check(operands, numbers):
+                return SMState.ERROR
+            state = handler()
+            if state != SMState.RUNNING:
+                break
+        return state
+
+    def execute(self, opcode: int) -> SMState:
+        """
+        Executes a single 6-bit code word given as integer through the dispatch table.
 
+        Args:
+            opcode (int): Command for the stack machine to execute (0 - 63)
+        Returns:
+            SMState: Current state of the stack machine
+        """
+        handler, operands, numbers = self.dispatch[opcode]
+        if not self.__check(operands, numbers):
+            return SMState.ERROR
+        state = handler()
+        logger.debug("The stack is %s", self.stack)
+        return state
+
+    def __execute_traced(self, opcode: int) -> SMState:
+        """
+        Replaces execute() if a tracer is given, measures the handler and records the result.
+        """
+        handler, operands, numbers = self.dispatch[opcode]
+        depth = len(self.stack)
+        if not self.__check(operands, numbers):
+            self.tracer.record(opcode, depth, depth, SMState.ERROR, 0.0)
+            return SMState.ERROR
+        start = time.perf_counter()
+        state = handler()
+        self.tracer.record(opcode, depth, len(self.stack), state, time.perf_counter() - start)
+        return state
+
+    def __check(self, operands: int, numbers: int) -> bool:
+        """
+        Checks that the stack holds enough operands for an instruction and that the top numbers of them are not
+        characters.
+        """
+        if len(self.stack) < operands:
+            logger.warning("Not enough operands")
+            return False
+        if numbers and not self.stack.operands(numbers):
+            logger.warning("Operand mismatch")
+            return False
+        return True
+
+    def opcode_names(self) -> Dict[int, str]:
+        """
+        Returns:
+            dict: Readable name of every code word, e.g. for RingTracer.report()
+        """
+        names = {value: "PUSH %d" % value for value in range(16)}
+        for code, name in self.Instruction.items():
+            names[int(code, 2)] = name
+        for code, character in self.Character.items():
+            names[int(code, 2)] = "PUSH %r" % character
+        return names
+
+    def __push(self, value: Union[int, str]) -> SMState:
+        """
+        Pushes an operand or a character on the stack.
+        """
+        if not self.stack.push(value):
+            logger.warning("Stack overflow")
+            return SMState.ERROR
+        return SMState.RUNNING
+
+    def __stp(self) -> SMState:
+        self.speaker.say("Instruction Stop", droppable=False)
+        logger.info("Final stack is %s", self.stack)
+        self.speaker.flush()
+        return SMState.STOPPED
+
+    def __dup(self) -> SMState:
+        self.speaker.say("Instruction Duplicate")
+        return self.__push(self.stack.peek())
+
+    def __del(self) -> SMState:
+        self.speaker.say("Instruction Delete")
+        self.stack.pop()
+        return SMState.RUNNING
+
+    def __swp(self) -> SMState:
+        self.speaker.say("Instruction Swap")
+        self.stack.swap()
+        return SMState.RUNNING
+
+    def __push_result(self, z: int) -> SMState:
+        """
+        Pushes the result of an arithmetic instruction modulo 256 and sets the overflow flag if it wrapped.
+        """
+        self.overflow = z < 0 or z > 255
+        if self.overflow:
+            logger.info("Result %d wrapped around", z)
+        self.stack.push(z & 0xFF)  # Never full, the instruction has popped at least one operand
+        return SMState.RUNNING
+
+    def __add(self) -> SMState:
+        self.speaker.say("Instruction Add")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        return self.__push_result(y + x)
+
+    def __sub(self) -> SMState:
+        self.speaker.say("Instruction Subtract")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        return self.__push_result(y - x)
+
+    def __mul(self) -> SMState:
+        self.speaker.say("Instruction Multiply")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        return self.__push_result(y * x)
+
+    def __div(self) -> SMState:
+        if self.stack.peek() == 0:
+            logger.warning("Division by 0")
+            return SMState.ERROR
+        self.speaker.say("Instruction Division")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        self.stack.push(y // x)
+        return SMState.RUNNING
+
+    def __exp(self) -> SMState:
+        self.speaker.say("Instruction Exponent")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        return self.__push_result(y ** x)
+
+    def __mod(self) -> SMState:
+        if self.stack.peek() == 0:
+            logger.warning("Modulo by 0")
+            return SMState.ERROR
+        self.speaker.say("Instruction Modulus")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        self.stack.push(y % x)
+        return SMState.RUNNING
+
+    def __shl(self) -> SMState:
+        self.speaker.say("Instruction Shift to left")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        return self.__push_result(y << x)
+
+    def __shr(self) -> SMState:
+        self.speaker.say("Instruction Shift to right")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        self.stack.push(y >> x)
+        return SMState.RUNNING
+
+    def __hex(self) -> SMState:
+        x = self.stack.peek()
+        y = self.stack.peek(2)
+        high = HEX_DIGITS.get(x)
+        low = HEX_DIGITS.get(y)
+        if high is None or low is None:
+            logger.warning("Not a hexadecimal digit: %s", x if high is None else y)
+            return SMState.ERROR
+        self.speaker.say("Instruction Hexadecimal")
+        self.stack.pop()
+        self.stack.pop()
+        self.stack.push(high << 4 | low)
+        return SMState.RUNNING
+
+    def __fac(self) -> SMState:
+        self.speaker.say("Instruction Factorial")
+        x = self.stack.pop()
+        self.overflow = bool(FACTORIAL_OVERFLOWS[x])
+        if self.overflow:
+            logger.info("Factorial of %d wrapped around", x)
+        self.stack.push(FACTORIALS[x])
+        return SMState.RUNNING
+
+    def __not(self) -> SMState:
+        self.speaker.say("Instruction ones complement")
+        self.stack.push(COMPLEMENTS[self.stack.pop()])
+        return SMState.RUNNING
+
+    def __xor(self) -> SMState:
+        self.speaker.say("Instruction XOR")
+        x = self.stack.pop()
+        y = self.stack.pop()
+        self.stack.push(x ^ y)
+        return SMState.RUNNING
+
+    def __speak(self) -> SMState:
+        k = self.stack.peek()
+        if len(self.stack) <= k:
+            logger.warning("Not enough operands")
+            return SMState.ERROR
+        self.stack.pop()
+        speakstack = []
+        for i in range(k):
+            speakstack.append(self.stack.pop())
+        text = "".join(str(value) for value in speakstack)
+        logger.info("Speak %s", text)
+        self.speaker.say(text, droppable=False)
+        return SMState.RUNNING
+
+    def __nop(self) -> SMState:
+        return SMState.RUNNING
 
+    def top(self) -> Union[None, str, Tuple[int, int, int, int, int, int, int, int]]:
+        """
+        Returns the top element of the stack without removing it and announces it.
 
+        Returns:
+            union: 8-tuple of bits (most significant first) for operands, str for characters, None if empty
+        """
+        if not self.stack:
+            return None
+        top = self.stack.peek()
+        if isinstance(top, str):
+            return top
+        self.speaker.say("Top element is " + str(top))
+        return BIT_TUPLES[top]
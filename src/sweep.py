@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+from typing import List, Tuple, Union
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Bits with a mean confidence between these bounds are reported as unknown (erasures)
+ERASURE_LOW = 0.35
+ERASURE_HIGH = 0.65
+
+# Fraction of a bit period at each side of a bit that is ignored, the sensor sees both neighbours there
+GUARD = 0.25
+
+
+def find_edges(confidences: List[float]) -> List[int]:
+    """
+    Finds the transitions between black and white in a sample stream.
+
+    Args:
+        confidences (list): Probability of each sample being black
+    Returns:
+        list: Index of the first sample after every transition
+    """
+    edges = []
+    previous = confidences[0] > 0.5
+    for index in range(1, len(confidences)):
+        current = confidences[index] > 0.5
+        if current != previous:
+            edges.append(index)
+            previous = current
+    return edges
+
+
+def recover_clock(confidences: List[float], bits: int) -> Tuple[float, float]:
+    """
+    Estimates where the bit boundaries lie in a sample stream that covers the line at a roughly constant speed.
+
+    The nominal clock splits the stream into equal parts. Every edge is assigned to the nearest nominal
+    boundary, and period and phase are fitted to the edges by least squares.
+
+    Args:
+        confidences (list): Probability of each sample being black
+        bits (int): Number of bits on the line
+    Returns:
+        tuple: (phase, period) in samples, bit i starts at phase + i * period
+    """
+    period = len(confidences) / bits
+    phase = 0.0
+    edges = find_edges(confidences)
+    points = []
+    for edge in edges:
+        boundary = round((edge - phase) / period)
+        if 0 < boundary < bits:
+            points.append((boundary, edge))
+
+    if len(points) >= 2 and len(set(boundary for boundary, edge in points)) >= 2:
+        count = len(points)
+        mean_boundary = sum(boundary for boundary, edge in points) / count
+        mean_edge = sum(edge for boundary, edge in points) / count
+        variance = sum((boundary - mean_boundary) ** 2 for boundary, edge in points)
+        covariance = sum((boundary - mean_boundary) * (edge - mean_edge) for boundary, edge in points)
+        period = covariance / variance
+        phase = mean_edge - period * mean_boundary
+    elif points:
+        # A single edge only tells the phase
+        boundary, edge = points[0]
+        phase = edge - period * boundary
+    return phase, period
+
+
+def recover_bits(confidences: List[float], bits: int) -> Tuple[List[Union[None, int]], List[float]]:
+    """
+    Recovers the bits of a line from a continuous sweep.
+
+    Args:
+        confidences (list): Probability of each sample being black, sampled at a fixed rate across the line
+        bits (int): Number of bits on the line
+    Returns:
+        tuple: (values, confidences) with one entry per bit, None for bits that can not be told apart
+    """
+    phase, period = recover_clock(confidences, bits)
+    values = []
+    bit_confidences = []
+    for i in range(bits):
+        start = int(round(phase + (i + GUARD) * period))
+        end = int(round(phase + (i + 1 - GUARD) * period))
+        window = confidences[max(start, 0):min(max(end, start + 1), len(confidences))]
+        confidence = sum(window) / len(window) if window else 0.5
+        bit_confidences.append(confidence)
+        if confidence >= ERASURE_HIGH:
+            values.append(1)
+        elif confidence <= ERASURE_LOW:
+            values.append(0)
+        else:
+            values.append(None)
+    return values, bit_confidences
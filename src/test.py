@@ -3,6 +3,7 @@
 import io
 import unittest.mock
 from hamming_code import *
+from robot import Robot
 from stack_machine import *
 
 
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+# IMPORTANT NOTE: DO NOT IMPORT THE ev3dev.ev3 MODULE IN THIS FILE
+
+# Latency histogram buckets: bucket i counts handler times below 2 ** i microseconds, the last one everything above
+HISTOGRAM_BUCKETS = 20
+
+
+class Tracer:
+    """
+    Receives one record per executed code word from StackMachine.
+
+    StackMachine only measures and calls record() if a tracer is given, without one execution costs nothing extra.
+    """
+
+    def record(self, opcode: int, depth_before: int, depth_after: int, state: int, elapsed: float) -> None:
+        """
+        Records an executed code word.
+
+        Args:
+            opcode (int): 6-bit code word
+            depth_before (int): Stack depth before execution
+            depth_after (int): Stack depth after execution
+            state (SMState): State returned by the handler
+            elapsed (float): Seconds spent in the handler
+        """
+        pass
+
+
+class RingTracer(Tracer):
+    """
+    Keeps the latest records in a ring buffer and accumulates per-opcode counts and latency histograms
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Initializes the class RingTracer with all values necessary.
+
+        Args:
+            capacity (int): Number of records kept, older ones are overwritten
+        """
+        self.ring = deque(maxlen=capacity)
+        self.counts = [0] * 64
+        self.totals = [0.0] * 64
+        self.histograms = [[0] * HISTOGRAM_BUCKETS for opcode in range(64)]
+
+    def record(self, opcode: int, depth_before: int, depth_after: int, state: int, elapsed: float) -> None:
+        self.ring.append((opcode, depth_before, depth_after, state, elapsed))
+        self.counts[opcode] += 1
+        self.totals[opcode] += elapsed
+        self.histograms[opcode][min(int(elapsed * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def records(self) -> List[Tuple[int, int, int, int, float]]:
+        """
+        Returns:
+            list: (opcode, depth before, depth after, state, seconds) of the latest code words, oldest first
+        """
+        return list(self.ring)
+
+    def opcode_counts(self) -> Dict[int, int]:
+        """
+        Returns:
+            dict: Number of executions of every opcode that was executed
+        """
+        return {opcode: count for opcode, count in enumerate(self.counts) if count}
+
+    def histogram(self, opcode: int) -> List[int]:
+        """
+        Args:
+            opcode (int): 6-bit code word
+        Returns:
+            list: Number of executions per latency bucket, bucket i below 2 ** i microseconds
+        """
+        return list(self.histograms[opcode])
+
+    def report(self, names: Dict[int, str] = None) -> str:
+        """
+        Formats count, total and mean handler time and the latency histogram of every opcode, the slowest first.
+
+        Args:
+            names (dict): Names of the opcodes, e.g. from StackMachine.opcode_names()
+        Returns:
+            str: One line per executed opcode
+        """
+        names = names or {}
+        opcodes = sorted(self.opcode_counts(), key=lambda opcode: self.totals[opcode], reverse=True)
+        lines = ["%-8s %6s %10s %10s  %s" % ("opcode", "count", "total ms", "mean us", "histogram (2^i us)")]
+        for opcode in opcodes:
+            histogram = self.histograms[opcode]
+            last = max(i for i, count in enumerate(histogram) if count)
+            lines.append("%-8s %6d %10.3f %10.1f  %s" % (
+                names.get(opcode, format(opcode, "06b")), self.counts[opcode], self.totals[opcode] * 1e3,
+                self.totals[opcode] / self.counts[opcode] * 1e6, " ".join(str(count) for count in histogram[:last + 1])))
+        return "\n".join(lines)
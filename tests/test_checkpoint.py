@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+from checkpoint import Checkpoint, JOURNAL_RECORD
+from hamming_code import HammingCode
+from pipeline import Pipeline
+from robot import Robot
+from simulator import SimulatedDevices
+from speech import SpeechQueue
+from stack_machine import StackMachine
+
+# 10 7 ADD, 3 MUL STP
+PROGRAM = ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1), (0, 1, 0, 1, 0, 0),
+           (0, 0, 0, 0, 1, 1), (0, 1, 0, 1, 1, 0), (0, 1, 0, 0, 0, 0))
+
+
+class Silent:
+    """
+    Speaker that drops every announcement
+    """
+
+    def say(self, text, droppable=True):
+        pass
+
+    def flush(self, timeout=None):
+        return True
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def run_words(self, words, line=0, **kwargs):
+        """ Executes and journals the code words on a new machine, then closes the journal as a restart would """
+        sm = StackMachine(Silent())
+        checkpoint = Checkpoint(self.directory.name, sm, **kwargs)
+        self.assertEqual(checkpoint.restore(), (0, 0))
+        for i, word in enumerate(words):
+            sm.do(word)
+            checkpoint.record(line + i, word)
+        return sm, checkpoint
+
+    def restore(self):
+        sm = StackMachine(Silent())
+        checkpoint = Checkpoint(self.directory.name, sm)
+        return sm, checkpoint, checkpoint.restore()
+
+    def test_replay(self):
+        """ Test that the journal is replayed onto an empty machine """
+        _, checkpoint = self.run_words(PROGRAM[:2], batch=1)
+        checkpoint.close()
+        sm, checkpoint, position = self.restore()
+        self.assertEqual(position, (0, 2))
+        self.assertEqual(sm.stack, [10, 7])
+        sm.do(PROGRAM[2])
+        checkpoint.record(2, PROGRAM[2])
+        checkpoint.close()
+        sm, _, position = self.restore()
+        self.assertEqual(position, (0, 3))
+        self.assertEqual(sm.stack, [17])
+
+    def test_snapshot(self):
+        """ Test that a snapshot replaces the journal and only the tail is replayed """
+        _, checkpoint = self.run_words(PROGRAM[:4], snapshot_every=3)
+        checkpoint.close()
+        # Three records are in the snapshot, the journal holds only the fourth
+        self.assertEqual(os.path.getsize(checkpoint.journal_path), JOURNAL_RECORD.size)
+        sm, _, position = self.restore()
+        self.assertEqual(position, (0, 4))
+        self.assertEqual(sm.stack, [17, 3])
+
+    def test_truncated(self):
+        """ Test that a record cut off by a power loss is ignored """
+        _, checkpoint = self.run_words(PROGRAM[:2])
+        checkpoint.close()
+        with open(checkpoint.journal_path, "r+b") as f:
+            f.truncate(2 * JOURNAL_RECORD.size - 3)
+        sm, _, position = self.restore()
+        self.assertEqual(position, (0, 1))
+        self.assertEqual(sm.stack, [10])
+
+    def test_record_after_truncation(self):
+        """ Test that records journaled after a torn record are replayed after the next restart """
+        _, checkpoint = self.run_words(PROGRAM[:2])
+        checkpoint.close()
+        with open(checkpoint.journal_path, "r+b") as f:
+            f.truncate(2 * JOURNAL_RECORD.size - 3)
+        sm, checkpoint, position = self.restore()
+        self.assertEqual(position, (0, 1))
+        self.assertEqual(os.path.getsize(checkpoint.journal_path), JOURNAL_RECORD.size)
+        for line in (1, 2):
+            sm.do(PROGRAM[line])
+            checkpoint.record(line, PROGRAM[line])
+        checkpoint.close()
+        sm, _, position = self.restore()
+        self.assertEqual(position, (0, 3))
+        self.assertEqual(sm.stack, [17])
+
+    def test_invalid_record(self):
+        """ Test that a record with an invalid code word ends the journal """
+        _, checkpoint = self.run_words(PROGRAM[:2])
+        checkpoint.close()
+        with open(checkpoint.journal_path, "ab") as f:
+            f.write(JOURNAL_RECORD.pack(3, 0, 2, 200))
+            f.write(JOURNAL_RECORD.pack(4, 0, 3, 3))
+        sm, checkpoint, position = self.restore()
+        self.assertEqual(position, (0, 2))
+        self.assertEqual(sm.stack, [10, 7])
+        self.assertEqual(os.path.getsize(checkpoint.journal_path), 2 * JOURNAL_RECORD.size)
+        checkpoint.close()
+
+    def test_end_card(self):
+        """ Test that the next card starts at its first line """
+        _, checkpoint = self.run_words(PROGRAM[:3])
+        checkpoint.end_card()
+        sm, checkpoint, position = self.restore()
+        self.assertEqual(position, (1, 0))
+        self.assertEqual(sm.stack, [17])
+        sm.do(PROGRAM[3])
+        checkpoint.record(0, PROGRAM[3])
+        checkpoint.close()
+        sm, _, position = self.restore()
+        self.assertEqual(position, (1, 1))
+        self.assertEqual(sm.stack, [17, 3])
+
+    def test_finish(self):
+        """ Test that nothing is resumed after the program has stopped """
+        _, checkpoint = self.run_words(PROGRAM[:3])
+        checkpoint.finish()
+        checkpoint.end_card()
+        checkpoint.close()
+        sm, _, position = self.restore()
+        self.assertEqual(position, (0, 0))
+        self.assertEqual(sm.stack, [])
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_resume(self, mock_stdout):
+        """ Test that the pipeline skips the lines of a reinserted card that were executed before the restart """
+        _, checkpoint = self.run_words(PROGRAM[:2])
+        checkpoint.close()
+
+        h = HammingCode()
+        devices = SimulatedDevices([[h.encode(word) for word in PROGRAM[:3]]], seed=1)
+        speaker = SpeechQueue(speak=devices.sound.speak)
+        sm = StackMachine(speaker)
+        checkpoint = Checkpoint(self.directory.name, sm)
+        card, line = checkpoint.restore()
+        pipeline = Pipeline(Robot(devices=devices), h, sm, speaker, samples=3, start_delay=0, clock=devices.clock,
+                            checkpoint=checkpoint)
+        self.assertEqual(pipeline.run(start_line=line), 3)
+        checkpoint.end_card()
+        speaker.close()
+        self.assertEqual(sm.stack, [17])
+        self.assertEqual(pipeline.timer.stages["scan"][0], 1)
+
+        sm, _, position = self.restore()
+        self.assertEqual(position, (1, 0))
+        self.assertEqual(sm.stack, [17])
+
+
+if __name__ == '__main__':
+    unittest.main()
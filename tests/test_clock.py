@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import unittest
+from clock import Clock, VirtualClock
+
+
+class TestClock(unittest.TestCase):
+    def test_clock(self):
+        """ Test the wall clock """
+        clock = Clock()
+        start = clock.monotonic()
+        clock.sleep(0.01)
+        clock.sleep(-1)
+        self.assertGreaterEqual(clock.monotonic() - start, 0.01)
+
+    def test_virtual_clock(self):
+        """ Test that virtual time only advances when slept on """
+        clock = VirtualClock(100)
+        self.assertEqual(clock.monotonic(), 100)
+        clock.sleep(15)
+        clock.sleep(-2)
+        self.assertEqual(clock.monotonic(), 115)
+        self.assertEqual(clock.slept, 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+from color_classifier import BLACK, RED, WHITE, ColorClassifier, majority_vote
+from robot import Robot
+from simulator import SimulatedDevices
+
+
+SAMPLES = {
+    WHITE: [(275, 435, 190), (270, 440, 185), (280, 430, 195)],
+    BLACK: [(140, 295, 90), (135, 300, 95), (145, 290, 85)],
+    RED: [(250, 255, 105), (255, 250, 110), (245, 260, 100)],
+}
+
+
+class TestColorClassifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = ColorClassifier.fit(SAMPLES)
+
+    def test_fit(self):
+        """ Test the centroids are the means of the calibration samples """
+        self.assertEqual(self.classifier.centroids[WHITE], (275.0, 435.0, 190.0))
+        self.assertEqual(self.classifier.centroids[BLACK], (140.0, 295.0, 90.0))
+        with self.assertRaises(ValueError):
+            ColorClassifier.fit({WHITE: SAMPLES[WHITE], BLACK: [], RED: SAMPLES[RED]})
+
+    def test_classify(self):
+        """ Test classification and confidence of samples near and between the centroids """
+        for value, readings in SAMPLES.items():
+            for sample in readings:
+                result, confidence = self.classifier.classify(sample)
+                self.assertEqual(result, value, sample)
+                self.assertGreater(confidence, 0.5, sample)
+
+        # Half-way between white and black the classification is uncertain
+        result, confidence = self.classifier.classify((208, 365, 140))
+        self.assertLess(confidence, 0.3)
+
+        # Far from every centroid
+        self.assertEqual(self.classifier.classify((1000, 10, 1000)), (None, 0.0))
+        self.assertEqual(self.classifier.classify((-5, 0, 0)), (None, 0.0))
+
+    def test_black_probability(self):
+        """ Test the soft value used for soft-decision decoding """
+        self.assertGreater(self.classifier.black_probability((140, 295, 90)), 0.9)
+        self.assertLess(self.classifier.black_probability((275, 435, 190)), 0.1)
+        self.assertAlmostEqual(self.classifier.black_probability((208, 365, 140)), 0.5, delta=0.15)
+
+    def test_save_load(self):
+        """ Test the calibration file round trip keeps the compiled tables """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "colors.cal")
+            self.classifier.save(path)
+            loaded = ColorClassifier.load(path)
+            self.assertEqual(loaded.centroids, self.classifier.centroids)
+            self.assertEqual(loaded.classes, self.classifier.classes)
+            self.assertEqual(loaded.confidences, self.classifier.confidences)
+            self.assertEqual(loaded.black_probabilities, self.classifier.black_probabilities)
+
+            # A truncated file is recompiled from the centroids
+            with open(path, "r+b") as f:
+                f.truncate(f.seek(0, os.SEEK_END) - 100)
+            loaded = ColorClassifier.load(path)
+            self.assertEqual(loaded.classes, self.classifier.classes)
+            self.assertEqual(os.listdir(directory), ["colors.cal"])  # Written through a temporary file
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_calibrate(self, mock_stdout):
+        """ Test calibration mode waiting on a button for each patch """
+        devices = SimulatedDevices([])
+        patches = [None] + [SAMPLES[value][0] for value in (WHITE, BLACK, RED)]
+        devices.color_sensor.read_rgb = lambda: patches[devices.buttons.presses]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "colors.cal")
+            robot = Robot(calibration_file=path, devices=devices)
+            classifier = robot.calibrate(samples=3)
+            self.assertEqual(devices.buttons.presses, 3)
+            self.assertEqual(classifier.centroids[RED], tuple(float(c) for c in SAMPLES[RED][0]))
+            self.assertTrue(os.path.exists(path))
+
+    def test_unreadable_file(self):
+        """ Test that a calibration file cut off within the centroids falls back to the hard-coded ranges """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "colors.cal")
+            self.classifier.save(path)
+            with open(path, "r+b") as f:
+                f.truncate(20)
+            with self.assertRaises(ValueError):
+                ColorClassifier.load(path)
+            with self.assertLogs("robot", "WARNING"):
+                robot = Robot(calibration_file=path, devices=SimulatedDevices([]))
+            self.assertIsNone(robot.classifier)
+            self.assertEqual(robot.classify((275, 435, 190)), 0)
+
+    def test_majority_vote(self):
+        """ Test voting on a burst of samples with early stopping """
+        def burst(values):
+            taken = []
+
+            def read():
+                taken.append(values[len(taken)])
+                return taken[-1]
+            return read, taken
+
+        read, taken = burst([1, 1, 1, 0, 0])
+        self.assertEqual(majority_vote(read, 5), (1, 1.0))
+        self.assertEqual(len(taken), 3)  # Two more samples can not outvote three
+
+        read, taken = burst([1, 0, 0, 1, 0])
+        self.assertEqual(majority_vote(read, 5), (0, 0.6))
+        self.assertEqual(len(taken), 5)
+
+        read, taken = burst([None, None, 5])
+        self.assertEqual(majority_vote(read, 3), (None, 1.0))
+        self.assertEqual(len(taken), 2)
+
+        read, taken = burst([0])
+        self.assertEqual(majority_vote(read, 1), (0, 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
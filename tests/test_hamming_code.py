@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
 
+import hamming_code
 from hamming_code import *       #importing subclasses
 
 m = HammingCode()   #assigning class to variable
@@ -38,6 +41,23 @@ class TestHammingCode(unittest.TestCase):
         result2 = m.decode((1,0,0,1,0,0,0,0,0,0,0))
         self.assertEqual(result1, result2, "Correct")
 
+        # Triple error whose syndrome matches no column of H
+        result1 = ((0, 0, 0, 0, 0, 0), HCResult.UNCORRECTABLE)
+        result2 = m.decode((0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 1))
+        self.assertEqual(result1, result2, "Correct")
+
+    def test_decode_table(self):
+        """ Test the precomputed decode table against encode() """
+        self.assertEqual(len(m.decode_table), 2048)
+        for i in range(64):
+            word = tuple((i >> (5 - j)) & 1 for j in range(6))
+            codeword = m.encode(word)
+            self.assertEqual(m.decode(codeword), (word, HCResult.VALID))
+            for position in range(11):
+                received = list(codeword)
+                received[position] ^= 1
+                self.assertEqual(m.decode(tuple(received)), (word, HCResult.CORRECTED))
+
 
     def test_encode(self):                      #testing encode function
         """ Essential: Test method encode() """
@@ -57,6 +77,163 @@ class TestHammingCode(unittest.TestCase):
         result4 = m.encode((1,1,1,1,1,0))
         self.assertEqual(result3, result4, "Correct")
 
+    def test_encode_int(self):
+        """ Test method encode_int() with packed words """
+        self.assertEqual(m.encode_int(0b011011), 0b01101111110)
+        self.assertEqual(m.encode_int(0b000000), 0b00000000000)
+        self.assertEqual(m.encode_int(0b111110), 0b11111011111)
+
+    def test_decode_int(self):
+        """ Test method decode_int() with packed words """
+        self.assertEqual(m.decode_int(0b10110111101), (0b101101, HCResult.VALID))
+        self.assertEqual(m.decode_int(0b00101111110), (0b011011, HCResult.CORRECTED))
+        self.assertEqual(m.decode_int(0b10010000000), (0b100100, HCResult.UNCORRECTABLE))
+        for word in range(64):
+            self.assertEqual(m.syndrome(m.encode_int(word)), 0)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_decode_batch(self):
+        """ Test method decode_batch() against decode_int() for every received word """
+        packed = np.arange(2048, dtype=np.uint16)
+        bits = ((packed[:, np.newaxis] >> np.arange(10, -1, -1)) & 1).astype(np.uint8)
+        for words in (packed, bits):
+            data, results = m.decode_batch(words)
+            self.assertEqual(data.shape, (2048, 6))
+            for codeword in range(2048):
+                word, result = m.decode_int(codeword)
+                self.assertEqual(int(data[codeword] @ (1 << np.arange(5, -1, -1))), word)
+                self.assertEqual(RESULT_CODES[results[codeword]], result)
+
+    def test_generator_matrix(self):
+        """ Test construction from an arbitrary non-systematic generator matrix """
+        code = HammingCode([list(row) for row in reversed(DEFAULT_GENERATOR)])
+        self.assertEqual(code.g, m.g)
+        self.assertEqual(code.h, m.h)
+
+        with self.assertRaises(ValueError):
+            HammingCode([[1, 1, 0, 0, 1],
+                         [1, 1, 0, 1, 0]])
+        # A zero column of H
+        with self.assertRaises(ValueError):
+            HammingCode([[1, 0, 0, 1],
+                         [0, 1, 0, 1]])
+        # Repeated columns of H
+        with self.assertRaises(ValueError):
+            HammingCode([[1, 0, 1, 0, 0],
+                         [0, 1, 1, 1, 0]])
+
+    def test_from_parameters(self):
+        """ Test a longer code built from (n, k) without a full decode table """
+        code = HammingCode.from_parameters(15, 11)
+        self.assertEqual((code.total_bits, code.data_bits, code.parity_bits), (15, 11, 4))
+        self.assertIsNone(code.decode_int_table)
+        for word in (0, 1, 0b10110011101, 0b11111111111):
+            codeword = code.encode_int(word)
+            self.assertEqual(code.decode_int(codeword), (word, HCResult.VALID))
+            for position in range(16):
+                self.assertEqual(code.decode_int(codeword ^ (1 << position)), (word, HCResult.CORRECTED))
+            self.assertEqual(code.decode_int(codeword ^ 0b11)[1], HCResult.UNCORRECTABLE)
+
+        with self.assertRaises(ValueError):
+            HammingCode.from_parameters(8, 5)
+
+        # No codebook for erasure and soft-decision decoding beyond MAX_TABLE_BITS data bits
+        code = HammingCode.from_parameters(31, 26)
+        self.assertIsNone(code.codebook)
+        with self.assertRaises(ValueError):
+            code.decode_erasures((None,) + (0,) * 31)
+        with self.assertRaises(ValueError):
+            code.decode_soft((0.5,) * 32)
+
+    def test_decode_invalid(self):
+        """ Test that decode() rejects words of the wrong length and bits other than 0 and 1 """
+        for word in ((1, 0, 1, 1, 0, 1, 1, 1, 1, 0), (1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 1, 0),
+                     (1, 0, 1, 1, 0, 1, 1, 1, 1, 0, None), (1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 5)):
+            with self.assertRaises(ValueError):
+                m.decode(word)
+
+    def test_compiled_cache(self):
+        """ Test that instances of the same code share their compiled tables """
+        self.assertIs(HammingCode().decode_int_table, m.decode_int_table)
+        self.assertIs(HammingCode([list(row) for row in DEFAULT_GENERATOR]).decode_table, m.decode_table)
+
+    def test_table_file_compiled(self):
+        """ Test that the table file is written when the code has been compiled before without it """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "hamming.tbl")
+            code = HammingCode(table_file=path)
+            self.assertIs(code.decode_int_table, m.decode_int_table)
+            self.assertEqual(os.path.getsize(path), 6 + 2 * 4 + 2 * 2048)
+
+    def test_table_file(self):
+        """ Test persisting and memory-mapping the decode table """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "hamming.tbl")
+            cached = dict(hamming_code._compiled_codes)
+            try:
+                hamming_code._compiled_codes.clear()
+                HammingCode(table_file=path)
+                self.assertEqual(os.path.getsize(path), 6 + 2 * 4 + 2 * 2048)
+
+                hamming_code._compiled_codes.clear()
+                code = HammingCode(table_file=path)
+                self.assertEqual(code.decode_int_table, m.decode_int_table)
+                self.assertEqual(code.decode_table, m.decode_table)
+
+                # A table of a different code is rebuilt instead of being used
+                other = HammingCode.from_parameters(10, 6)
+                self.assertNotEqual(other.h_masks, m.h_masks)
+                hamming_code._compiled_codes.clear()
+                code = HammingCode(other.g, table_file=path)
+                self.assertEqual(code.decode_int_table, other.decode_int_table)
+            finally:
+                hamming_code._compiled_codes.clear()
+                hamming_code._compiled_codes.update(cached)
+
+    def test_decode_erasures(self):
+        """ Test method decode_erasures() with unreadable bits """
+        codeword = m.encode((1, 0, 1, 1, 0, 1))
+        self.assertEqual(m.min_distance, 4)
+        self.assertEqual(m.decode_erasures(codeword), ((1, 0, 1, 1, 0, 1), HCResult.VALID))
+
+        # Up to three erasures
+        for positions in ((0,), (3, 10), (1, 5, 8)):
+            received = list(codeword)
+            for position in positions:
+                received[position] = None
+            self.assertEqual(m.decode_erasures(tuple(received)), ((1, 0, 1, 1, 0, 1), HCResult.CORRECTED))
+
+        # One erasure and one error
+        received = list(codeword)
+        received[2] = None
+        received[7] ^= 1
+        self.assertEqual(m.decode_erasures(tuple(received)), ((1, 0, 1, 1, 0, 1), HCResult.CORRECTED))
+
+        # Two erasures and one error
+        received[9] = None
+        self.assertEqual(m.decode_erasures(tuple(received)), (None, HCResult.UNCORRECTABLE))
+
+    def test_decode_soft(self):
+        """ Test method decode_soft() with per-bit confidences """
+        codeword = m.encode((1, 0, 1, 1, 0, 1))
+        confident = tuple(0.95 if bit else 0.05 for bit in codeword)
+        self.assertEqual(m.decode_soft(confident), ((1, 0, 1, 1, 0, 1), HCResult.VALID))
+
+        # Two bits on the wrong side of 0.5, a hard decision would be UNCORRECTABLE
+        confidences = list(confident)
+        confidences[0] = 0.4
+        confidences[7] = 0.45
+        self.assertEqual(m.decode(tuple(int(c > 0.5) for c in confidences))[1], HCResult.UNCORRECTABLE)
+        self.assertEqual(m.decode_soft(tuple(confidences)), ((1, 0, 1, 1, 0, 1), HCResult.CORRECTED))
+
+        # Unknown bits count as 0.5
+        confidences = list(confident)
+        confidences[2] = None
+        self.assertEqual(m.decode_soft(tuple(confidences)), ((1, 0, 1, 1, 0, 1), HCResult.CORRECTED))
+
+        # Nothing known at all
+        self.assertEqual(m.decode_soft((0.5,) * 11)[1], HCResult.UNCORRECTABLE)
+
 
 if __name__ == '__main__':
     unittest.main()
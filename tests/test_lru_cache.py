@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import unittest
+from lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_lru(self):
+        """ Test that the least recently used entry is evicted """
+        cache = LRUCache(2)
+        cache.put((0, 1), "a")
+        cache.put((1, 0), "b")
+        self.assertEqual(cache.get((0, 1)), "a")
+        cache.put((1, 1), "c")
+        self.assertIsNone(cache.get((1, 0)))
+        self.assertEqual(cache.get((0, 1)), "a")
+        self.assertEqual(cache.get((1, 1)), "c")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_release(self):
+        """ Test that evicted entries are released """
+        released = []
+        cache = LRUCache(1, release=released.append)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(released, [1])
+
+    def test_hit_rate(self):
+        """ Test the hit and miss counters """
+        cache = LRUCache()
+        self.assertEqual(cache.hit_rate(), 0.0)
+        self.assertIsNone(cache.get((None, 1)))
+        cache.put((None, 1), "a")
+        cache.get((None, 1))
+        cache.get((None, 1))
+        cache.get((None, 1))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+        self.assertEqual(cache.hit_rate(), 0.75)
+        self.assertIn("hit rate 75.0%", cache.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import errno
+import io
+import threading
+import unittest
+import unittest.mock
+from unittest.mock import Mock
+from color_classifier import majority_vote
+from hamming_code import HammingCode
+from pipeline import Pipeline, StageTimer
+from stack_machine import StackMachine
+
+
+class CardRobot:
+    """
+    Serves the lines of an encoded card, raw samples are the bits themselves
+    """
+
+    def __init__(self, lines, slipping=()):
+        self.lines = lines
+        self.slipping = set(slipping)  # Lines on which one backwards step gets lost
+        self.line = 0
+        self.position = 0  # 0 is the red marker, bit i is read at position i + 1
+        self.resets = 0
+
+    def read_value(self):
+        return 5 if self.position == 0 and self.line < len(self.lines) else 0
+
+    def sensor_step(self, direction=1):
+        if direction < 0 and self.line in self.slipping:
+            self.slipping.remove(self.line)
+            return
+        self.position += direction
+
+    def sensor_reset(self):
+        self.position = 0
+        self.resets += 1
+
+    def scroll_step(self):
+        self.line += 1
+
+    def card_present(self):
+        return self.line < len(self.lines)
+
+    def read_raw(self):
+        if not 0 <= self.line < len(self.lines) or not 0 < self.position <= len(self.lines[self.line]):
+            return None
+        return self.lines[self.line][self.position - 1]
+
+    def classify(self, b):
+        return b
+
+    def bit_confidence(self, b):
+        return 0.5 if b is None else 0.9 * b + 0.05
+
+
+class NoisyCardRobot(CardRobot):
+    """
+    Flips the first sample of every bit in a burst read and counts the samples taken
+    """
+
+    def __init__(self, lines):
+        super().__init__(lines)
+        self.samples = 0
+
+    def read_burst(self, samples):
+        burst = []
+
+        def read():
+            b = self.read_raw()
+            if not burst and b is not None:
+                b ^= 1
+            burst.append(b)
+            self.samples += 1
+            return b
+
+        value, agreement = majority_vote(read, samples)
+        return value, agreement, sum(self.bit_confidence(b) for b in burst) / len(burst)
+
+
+class TestPipeline(unittest.TestCase):
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_run(self, mock_stdout):
+        """ Test a whole card through the pipeline: 10 7 ADD STP """
+        h = HammingCode()
+        lines = [list(h.encode(word)) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1),
+                                                   (0, 1, 0, 1, 0, 0), (0, 1, 0, 0, 0, 0))]
+        lines[1][3] = None  # Unreadable bit, resolved without a rescan
+        lines[2][0] ^= 1   # Single error
+
+        robot = CardRobot(lines)
+        sm = StackMachine(Mock())
+        pipeline = Pipeline(robot, h, sm, Mock(), start_delay=0, settle_delay=0, rescan_delay=0)
+        pipeline.run()
+
+        self.assertEqual(robot.line, 4)
+        self.assertEqual(sm.stack, [17])
+        for stage in ("scan", "reset", "decode", "scroll", "announce", "execute"):
+            self.assertEqual(pipeline.timer.stages[stage][0], 4, stage)
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_bidirectional(self, mock_stdout):
+        """ Test reading every other line backwards: 10 7 ADD 3 MUL STP """
+        h = HammingCode()
+        words = ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1), (0, 1, 0, 1, 0, 0),
+                 (0, 0, 0, 0, 1, 1), (0, 1, 0, 1, 1, 0), (0, 1, 0, 0, 0, 0))
+        lines = [h.encode(word) for word in words]
+
+        robot = CardRobot(lines, slipping=(3,))
+        sm = StackMachine(Mock())
+        pipeline = Pipeline(robot, h, sm, Mock(), bidirectional=True,
+                            start_delay=0, settle_delay=0, rescan_delay=0)
+        pipeline.run()
+
+        self.assertEqual(robot.line, 6)
+        self.assertEqual(sm.stack, [51])
+        # One reset after the drift on line 3 and one after the end of the card
+        self.assertEqual(robot.resets, 2)
+        # Line 3 is read twice, the end of the card is detected before another backwards read
+        self.assertEqual(pipeline.timer.stages["scan"][0], 7)
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_burst(self, mock_stdout):
+        """ Test voting on several samples per bit: 10 7 ADD STP """
+        h = HammingCode()
+        lines = [h.encode(word) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1),
+                                             (0, 1, 0, 1, 0, 0), (0, 1, 0, 0, 0, 0))]
+
+        robot = NoisyCardRobot(lines)
+        sm = StackMachine(Mock())
+        pipeline = Pipeline(robot, h, sm, Mock(), samples=5, start_delay=0, settle_delay=0, rescan_delay=0)
+        pipeline.run()
+
+        self.assertEqual(sm.stack, [17])
+        self.assertEqual(pipeline.timer.stages["scan"][0], 4)  # No rescans
+        # One flipped and four agreeing samples per bit, the fifth sample is never taken
+        self.assertEqual(robot.samples, 4 * 11 * 4)
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_uncorrectable(self, mock_stdout):
+        """ Test that a line with two errors is neither executed nor journaled: 10 (1 0) 7 ADD STP """
+        h = HammingCode()
+        lines = [list(h.encode(word)) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 0, 0, 1), (0, 0, 0, 1, 1, 1),
+                                                   (0, 1, 0, 1, 0, 0), (0, 1, 0, 0, 0, 0))]
+        lines[1][0] ^= 1  # Two errors, read the same way twice
+        lines[1][1] ^= 1
+
+        robot = CardRobot(lines)
+        sm = StackMachine(Mock())
+        speaker = Mock()
+        checkpoint = Mock()
+        pipeline = Pipeline(robot, h, sm, speaker, start_delay=0, checkpoint=checkpoint)
+        pipeline.run()
+
+        self.assertEqual(sm.stack, [17])
+        self.assertEqual(pipeline.timer.stages["scan"][0], 6)  # One rescan
+        self.assertEqual(pipeline.timer.stages["execute"][0], 4)
+        self.assertEqual([c[0][0] for c in checkpoint.record.call_args_list], [0, 2, 3])
+        speaker.say.assert_any_call("error")
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_worker_error(self, mock_stdout):
+        """ Test that an exception on the execute thread stops the scan and is raised by run() """
+        h = HammingCode()
+        lines = [h.encode((0, 0, 0, 0, 0, 1))] * 8
+        robot = CardRobot(lines)
+        checkpoint = Mock()
+        checkpoint.record.side_effect = OSError(errno.ENOSPC, "No space left on device")
+        pipeline = Pipeline(robot, h, StackMachine(Mock()), Mock(), depth=1, start_delay=0, checkpoint=checkpoint)
+
+        errors = []
+
+        def run():
+            try:
+                pipeline.run()
+            except OSError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([error.errno for error in errors], [errno.ENOSPC])
+        self.assertLess(robot.line, len(lines))
+        self.assertEqual(checkpoint.record.call_count, 1)
+
+    def test_report(self):
+        """ Test the stage report """
+        timer = StageTimer()
+        with timer.measure("decode"):
+            pass
+        self.assertIn("decode", timer.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
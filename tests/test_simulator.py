@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+import main
+from devices import Motor, Sound
+from hamming_code import HammingCode
+from pipeline import Pipeline
+from robot import Robot, STEP_COUNTS, STEP_SPEED
+from simulator import MOVE_SETTLE_TIME, SimulatedDevices
+from speech import SpeechQueue
+from stack_machine import StackMachine
+
+
+class TestSimulator(unittest.TestCase):
+    def test_motor(self):
+        """ Test motor moves take virtual time """
+        devices = SimulatedDevices([])
+        m = devices.sensor_motor
+        m.run_to_rel_pos(STEP_COUNTS, STEP_SPEED)
+        self.assertEqual(m.position, 0)
+        self.assertTrue(m.wait_until_idle(10))
+        self.assertEqual(m.position, STEP_COUNTS)
+        self.assertAlmostEqual(devices.clock.monotonic(), STEP_COUNTS / STEP_SPEED + MOVE_SETTLE_TIME)
+
+        m.run_to_rel_pos(-2 * STEP_COUNTS, STEP_SPEED)
+        self.assertFalse(m.wait_until_idle(1))
+        self.assertTrue(m.wait_until_idle(10))
+        self.assertEqual(m.position, -STEP_COUNTS)
+
+        m.run_forever(100)
+        self.assertFalse(m.wait_until_idle(2))
+        m.stop()
+        self.assertEqual(m.position, 200 - STEP_COUNTS)
+        m.reset()
+        self.assertEqual(m.position, 0)
+
+    def test_incomplete_backend(self):
+        """ Test that a backend missing an interface method can not be created """
+        class HalfMotor(Motor):
+            position = 0
+
+            def reset(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            HalfMotor()
+        with self.assertRaises(TypeError):
+            Sound()
+
+    def test_color_sensor(self):
+        """ Test the card image under the sensor """
+        devices = SimulatedDevices([[(1, 0) + (0,) * 9]], noise=0)
+        robot = Robot(devices=devices)
+        self.assertEqual(robot.classify_ranges(robot.read_raw()), 5)
+        robot.sensor_step()
+        self.assertEqual(robot.classify_ranges(robot.read_raw()), 1)
+        robot.sensor_step()
+        self.assertEqual(robot.classify_ranges(robot.read_raw()), 0)
+        robot.sensor_reset()
+        self.assertEqual(robot.sensor_motor.position, 0)
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_pipeline(self, mock_stdout):
+        """ Test a deck of two noisy cards through the pipeline: 10 7 ADD, 3 MUL STP """
+        h = HammingCode()
+        cards = [[h.encode(word) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1), (0, 1, 0, 1, 0, 0))],
+                 [h.encode(word) for word in ((0, 0, 0, 0, 1, 1), (0, 1, 0, 1, 1, 0), (0, 1, 0, 0, 0, 0))]]
+        devices = SimulatedDevices(cards, noise=5, position_noise=3, seed=1)
+        speaker = SpeechQueue(speak=devices.sound.speak)
+        sm = StackMachine(speaker)
+        pipeline = Pipeline(Robot(devices=devices), h, sm, speaker, samples=3, start_delay=0, clock=devices.clock)
+
+        pipeline.run()
+        self.assertEqual(sm.stack, [17])
+        pipeline.run()
+        self.assertEqual(sm.stack, [51])
+        self.assertEqual(devices.cards, 2)
+        self.assertEqual(pipeline.timer.stages["scan"][0], 6)
+        self.assertGreater(devices.clock.monotonic(), 6 * 11 * STEP_COUNTS / STEP_SPEED)
+
+        speaker.close()
+        self.assertIn("51", " ".join(devices.sound.spoken))
+
+        # The stage times are virtual
+        count, total, maximum = pipeline.timer.stages["line"]
+        self.assertEqual(count, 6)
+        self.assertLess(total, devices.clock.monotonic())
+        self.assertGreater(maximum, 11 * STEP_COUNTS / STEP_SPEED)
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_card_boundary(self, mock_stdout):
+        """ Test that a card with an odd number of lines ends before the next card is read backwards """
+        h = HammingCode()
+        cards = [[h.encode(word) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1), (0, 1, 0, 1, 0, 0))],
+                 [h.encode(word) for word in ((0, 0, 0, 0, 1, 1), (0, 1, 0, 1, 1, 0), (0, 1, 0, 0, 0, 0))]]
+        for sweep in (False, True):
+            devices = SimulatedDevices(cards, seed=1)
+            speaker = SpeechQueue(speak=devices.sound.speak)
+            sm = StackMachine(speaker)
+            pipeline = Pipeline(Robot(devices=devices), h, sm, speaker, sweep=sweep, bidirectional=True,
+                                samples=3, start_delay=0, clock=devices.clock)
+            self.assertEqual(pipeline.run(), 3)
+            self.assertEqual(sm.stack, [17])
+            self.assertEqual(pipeline.run(), 3)
+            self.assertEqual(sm.stack, [51])
+            self.assertEqual(devices.cards, 2)
+            speaker.close()
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_main(self, mock_stdout):
+        """ Test main.run() on simulated devices with the default configuration, start delay included """
+        h = HammingCode()
+        cards = [[h.encode(word) for word in ((0, 0, 1, 0, 1, 0), (0, 0, 0, 1, 1, 1), (0, 1, 0, 1, 0, 0),
+                                              (0, 1, 0, 0, 0, 0))]] * 3
+        devices = SimulatedDevices(cards, seed=2)
+        with tempfile.TemporaryDirectory() as directory:
+            with unittest.mock.patch("main.HAMMING_TABLE_FILE", os.path.join(directory, "hamming.tbl")), \
+                    unittest.mock.patch("main.CALIBRATION_FILE", os.path.join(directory, "colors.cal")), \
+                    unittest.mock.patch("main.CHECKPOINT_DIR", os.path.join(directory, "checkpoint")):
+                main.run(devices, cards=3)
+        self.assertEqual(devices.cards, 3)
+        self.assertEqual(devices.sound.spoken.count("Instruction Stop"), 3)  # Never dropped
+        # Four lines per card with a start delay of 8 seconds each and 5 seconds between the cards
+        self.assertGreater(devices.clock.monotonic(), 3 * (4 * 8 + 5))
+        self.assertGreater(devices.clock.slept, 3 * (4 * 8 + 5))
+
+
+    @unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_main_polls(self, mock_stdout):
+        """ Test that main.run() counts processed cards, not passes without a card """
+        devices = SimulatedDevices([])
+        with tempfile.TemporaryDirectory() as directory:
+            with unittest.mock.patch("main.HAMMING_TABLE_FILE", os.path.join(directory, "hamming.tbl")), \
+                    unittest.mock.patch("main.CALIBRATION_FILE", os.path.join(directory, "colors.cal")), \
+                    unittest.mock.patch("main.CHECKPOINT_DIR", os.path.join(directory, "checkpoint")), \
+                    unittest.mock.patch.object(main.Pipeline, "run", side_effect=[0, 0, 3, 0, 4]) as run:
+                main.run(devices, cards=2)
+        self.assertEqual(run.call_count, 5)
+        self.assertEqual(devices.clock.slept, 5 * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+from devices import Sound
+from simulator import SimulatedSound
+from speech import RenderedSpeech, SpeechQueue
+
+
+class TestSpeechQueue(unittest.TestCase):
+    def setUp(self):
+        self.spoken = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+        def speak(text):
+            self.started.set()
+            self.release.wait(5)
+            self.spoken.append(text)
+
+        self.queue = SpeechQueue(maxsize=2, speak=speak)
+
+    def tearDown(self):
+        self.release.set()
+        self.queue.close()
+
+    def test_flush(self):
+        """ Test that flush() waits for every announcement """
+        self.release.set()
+        self.queue.say("one")
+        self.queue.say(2)
+        self.assertTrue(self.queue.flush(5))
+        self.assertEqual(self.spoken, ["one", "2"])
+
+    def test_backpressure(self):
+        """ Test coalescing and dropping of stale announcements """
+        self.queue.say("busy")
+        self.assertTrue(self.started.wait(5))  # The worker is now blocked speaking "busy"
+
+        self.queue.say("a")
+        self.queue.say("a")  # Coalesced
+        self.queue.say("keep", droppable=False)
+        self.queue.say("b")  # Queue full, "a" is dropped
+        self.assertEqual(self.queue.dropped, 1)
+        self.assertFalse(self.queue.flush(0.01))
+
+        self.release.set()
+        self.assertTrue(self.queue.flush(5))
+        self.assertEqual(self.spoken, ["busy", "keep", "b"])
+
+
+class RecordingSound(Sound):
+    """
+    Renders a text into a numbered clip and records the clips played and discarded
+    """
+
+    def __init__(self):
+        self.rendered = []
+        self.played = []
+        self.discarded = []
+
+    def speak(self, text):
+        self.played.append(text)
+
+    def render(self, text):
+        self.rendered.append(text)
+        return len(self.rendered)
+
+    def play(self, audio):
+        self.played.append(audio)
+
+    def discard(self, audio):
+        self.discarded.append(audio)
+
+
+class TestRenderedSpeech(unittest.TestCase):
+    def test_cache(self):
+        """ Test that repeated texts are played from the cache without being rendered again """
+        sound = RecordingSound()
+        speech = RenderedSpeech(sound, capacity=2)
+        for text in ("six bit output is", "(0, 1)", "six bit output is", "(1, 1)", "six bit output is", "(0, 1)"):
+            speech(text)
+        self.assertEqual(sound.rendered, ["six bit output is", "(0, 1)", "(1, 1)", "(0, 1)"])
+        self.assertEqual(sound.played, [1, 2, 1, 3, 1, 4])
+        self.assertEqual(sound.discarded, [2, 3])  # Least recently spoken
+        self.assertEqual((speech.cache.hits, speech.cache.misses), (2, 4))
+
+    def test_default_render(self):
+        """ Test that a backend without rendering speaks the text """
+        sound = SimulatedSound()
+        speech = RenderedSpeech(sound)
+        speech("Instruction Add")
+        speech("Instruction Add")
+        self.assertEqual(sound.spoken, ["Instruction Add", "Instruction Add"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 
 import unittest
-from unittest.mock import patch, call
-from stack_machine import StackMachine, SMState
+from unittest.mock import Mock, patch, call
+from stack_machine import COMPLEMENTS, OperandStack, StackMachine, SMState
+from tracer import Tracer
 from ctypes import c_ubyte
 
 class TestStackMachine(unittest.TestCase):
@@ -279,6 +280,115 @@ class TestStackMachine(unittest.TestCase):
         self.sm.do((0, 1, 1, 1, 1, 1))
         self.assertEqual([self.sm.stack[0].value, self.sm.overflow], [13, False])
 
+    def test_validate(self):
+        """ Test Method: validate() """
+        self.assertIsNone(self.sm.validate([10, 7, 0b010100, 0b010000]))
+        self.assertEqual(self.sm.validate([10, 0b010011]), 1)               # SWP with one operand
+        self.assertEqual(self.sm.validate([10, 2, 0b010111, 0b010111]), 3)  # second DIV
+        self.assertEqual(self.sm.validate([0b100100, 0b100101, 3, 0b100001]), 3)  # SPEAK 3 of 2
+        self.assertIsNone(self.sm.validate([0b010000, 0b010100]))           # nothing runs after STP
+
+    def test_run_program(self):
+        """ Test Method: run_program() """
+        speaker = Mock()
+        sm = StackMachine(speaker)
+
+        # Rejected before anything is executed
+        self.assertEqual(sm.run_program([(0, 0, 1, 0, 1, 0), (0, 1, 0, 1, 0, 0)]), SMState.ERROR)
+        self.assertEqual(sm.stack, [])
+        speaker.say.assert_not_called()
+
+        # 10 7 ADD 3 MUL STP
+        self.assertEqual(sm.run_program([10, 7, 0b010100, (0, 0, 0, 0, 1, 1), 0b010110, 0b010000]),
+                         SMState.STOPPED)
+        self.assertEqual(sm.stack, [51])
+        speaker.flush.assert_called_once_with()
+
+    def test_operand_stack(self):
+        """ Test Class: OperandStack """
+        stack = OperandStack(capacity=3)
+        self.assertTrue(stack.push(200))
+        self.assertTrue(stack.push("A"))
+        self.assertEqual([stack[0].value, stack[1], stack[-1]], [200, "A", "A"])
+        self.assertEqual(stack, [200, "A"])
+        self.assertEqual((len(stack), stack.peek(), stack.peek(2)), (2, "A", 200))
+
+        stack.swap()
+        self.assertEqual(stack, [200, "A"][::-1])
+        snapshot = stack.snapshot()
+        self.assertEqual(len(snapshot), 4)
+
+        # Full stack
+        self.assertTrue(stack.push(7))
+        self.assertFalse(stack.push(8))
+        self.assertTrue(stack.overflow)
+        self.assertEqual(stack.pop(), 7)
+
+        stack.clear()
+        self.assertEqual((len(stack), stack.overflow), (0, False))
+        self.assertRaises(IndexError, stack.pop)
+        stack.restore(snapshot)
+        self.assertEqual(stack, ["A", 200])
+
+    def test_wrap(self):
+        """ Test 8-bit results wrap around and set the overflow flag """
+        sm = StackMachine(Mock())
+        self.assertEqual(sm.run_program([2, 10, 0b010101]), SMState.RUNNING)  # SUB
+        self.assertEqual([sm.stack[0].value, sm.overflow], [248, True])
+        self.assertEqual(sm.run_program([3, 0b010110]), SMState.RUNNING)  # MUL
+        self.assertEqual([sm.stack[0].value, sm.overflow], [232, True])
+        self.assertEqual(sm.run_program([1, 0b010100]), SMState.RUNNING)  # ADD
+        self.assertEqual([sm.stack[0].value, sm.overflow], [233, False])
+
+    def test_errors(self):
+        """ Test that an instruction that fails returns ERROR and leaves the stack unchanged """
+        for tracer in (None, Tracer()):
+            sm = StackMachine(Mock(), tracer)
+            # Empty stack: DUP, DEL, NOT, FAC
+            for opcode in (0b010001, 0b010010, 0b011110, 0b011101):
+                self.assertEqual(sm.execute(opcode), SMState.ERROR)
+                self.assertEqual(sm.stack, [])
+            for program, stack in (([0b100100, 3, 0b010100], ["A", 3]),        # A 3 ADD
+                                   ([3, 0b100100, 0b010100], [3, "A"]),        # 3 A ADD
+                                   ([0b100100, 0b011110], ["A"]),              # A NOT
+                                   ([0b100100, 0b011101], ["A"]),              # A FAC
+                                   ([10, 0, 0b010111], [10, 0]),               # 10 0 DIV
+                                   ([10, 0, 0b011001], [10, 0]),               # 10 0 MOD
+                                   ([12, 3, 0b011100], [12, 3]),               # 12 3 HEX
+                                   ([0b100100, 0b100101, 0b100001], ["A", "B"])):  # A B SPEAK
+                sm.stack.clear()
+                for opcode in program[:-1]:
+                    sm.execute(opcode)
+                self.assertEqual(sm.execute(program[-1]), SMState.ERROR, program)
+                self.assertEqual(sm.stack, stack, program)
+            self.assertEqual(sm.run_program([0b100100, 3, 0b010100]), SMState.ERROR)
+
+    def test_tables(self):
+        """ Test the table-driven handlers: FAC, NOT, HEX, XOR and top() """
+        sm = StackMachine(Mock())
+        sm.run_program([5, 0b011101])
+        self.assertEqual([sm.stack[-1].value, sm.overflow], [120, False])
+        sm.run_program([6, 0b011101])
+        self.assertEqual([sm.stack[-1].value, sm.overflow], [208, True])
+        sm.run_program([12, 0b011110])
+        self.assertEqual(sm.stack[-1].value, 3)
+        # Only the four low bits are complemented above 15: NOT 16, NOT 200
+        sm.run_program([4, 4, 0b010110, 0b011110])
+        self.assertEqual(sm.stack[-1].value, 31)
+        sm.run_program([0b010010, 10, 10, 0b010110, 2, 0b010110, 0b011110])
+        self.assertEqual(sm.stack[-1].value, 199)
+        sm.run_program([0b010010])
+        # NOT is its own inverse over 0 - 255
+        for value in range(256):
+            self.assertEqual(COMPLEMENTS[COMPLEMENTS[value]], value)
+        sm.run_program([0b100110, 9, 0b011100])  # C 9 HEX
+        self.assertEqual(sm.stack[-1].value, 0x9C)
+        sm.run_program([0b011111])  # 0x9C XOR 3
+        self.assertEqual(sm.stack[-1].value, 0x9F)
+        self.assertEqual(sm.top(), (1, 0, 0, 1, 1, 1, 1, 1))
+        self.assertEqual(len(sm.stack), 3)  # top() does not remove the element
+        sm.speaker.say.assert_called_with("Top element is 159")
+
 
 if __name__ == '__main__':
     unittest.main()
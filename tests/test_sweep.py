@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import unittest
+from sweep import find_edges, recover_bits, recover_clock
+
+
+def sweep(bits, samples_per_bit, offset=0.0):
+    """ Samples a line at a constant rate, the clock is stretched and shifted by offset samples """
+    confidences = []
+    for i in range(int(len(bits) * samples_per_bit)):
+        bit = int((i - offset) / samples_per_bit)
+        bit = min(max(bit, 0), len(bits) - 1)
+        confidences.append(0.9 if bits[bit] else 0.1)
+    return confidences
+
+
+class TestSweep(unittest.TestCase):
+    def test_find_edges(self):
+        """ Test edge detection """
+        self.assertEqual(find_edges([0.1, 0.1, 0.9, 0.9, 0.2]), [2, 4])
+        self.assertEqual(find_edges([0.1, 0.2]), [])
+
+    def test_recover_clock(self):
+        """ Test clock recovery on a stretched and shifted sweep """
+        bits = (1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 1)
+        phase, period = recover_clock(sweep(bits, 10.6, offset=-3), 11)
+        self.assertAlmostEqual(period, 10.6, delta=0.6)
+        self.assertAlmostEqual(phase, -3, delta=1.5)
+
+    def test_recover_bits(self):
+        """ Test bit recovery from continuous sweeps """
+        bits = (1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 1)
+        for samples_per_bit, offset in ((20, 0), (20, 4), (18.5, -2), (9, 0)):
+            values, confidences = recover_bits(sweep(bits, samples_per_bit, offset), 11)
+            self.assertEqual(tuple(values), bits, (samples_per_bit, offset))
+
+        # A sample stream without any contrast gives unknown bits
+        values, confidences = recover_bits([0.5] * 110, 11)
+        self.assertEqual(values, [None] * 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
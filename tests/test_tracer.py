@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from stack_machine import SMState, StackMachine
+from tracer import RingTracer
+
+
+class TestTracer(unittest.TestCase):
+    def test_ring_tracer(self):
+        """ Test the ring buffer, counts and histograms """
+        tracer = RingTracer(capacity=2)
+        tracer.record(10, 0, 1, SMState.RUNNING, 0.0000005)
+        tracer.record(10, 1, 2, SMState.RUNNING, 0.000003)
+        tracer.record(0b010100, 2, 1, SMState.RUNNING, 1.0)
+        self.assertEqual(tracer.records(), [(10, 1, 2, SMState.RUNNING, 0.000003),
+                                            (0b010100, 2, 1, SMState.RUNNING, 1.0)])
+        self.assertEqual(tracer.opcode_counts(), {10: 2, 0b010100: 1})
+        self.assertEqual(tracer.histogram(10)[:3], [1, 0, 1])  # below 1 us, below 4 us
+        self.assertEqual(tracer.histogram(0b010100)[-1], 1)    # beyond the last bucket
+        report = tracer.report({0b010100: "ADD"}).splitlines()
+        self.assertEqual(len(report), 3)
+        self.assertTrue(report[1].startswith("ADD"))           # the slowest first
+
+    def test_stack_machine(self):
+        """ Test the records of executed code words """
+        tracer = RingTracer()
+        sm = StackMachine(Mock(), tracer)
+        sm.do((0, 0, 1, 0, 1, 0))
+        sm.do((0, 1, 0, 1, 0, 0))  # ADD with one operand
+        self.assertEqual(sm.run_program([7, 0b010100, 0b010000]), SMState.STOPPED)
+
+        records = [record[:4] for record in tracer.records()]
+        self.assertEqual(records, [(10, 0, 1, SMState.RUNNING), (0b010100, 1, 1, SMState.ERROR),
+                                   (7, 1, 2, SMState.RUNNING), (0b010100, 2, 1, SMState.RUNNING),
+                                   (0b010000, 1, 1, SMState.STOPPED)])
+        self.assertEqual(tracer.opcode_counts()[0b010100], 2)
+        self.assertIn("ADD", tracer.report(sm.opcode_names()))
+        self.assertEqual(sm.stack, [17])
+
+
+if __name__ == '__main__':
+    unittest.main()